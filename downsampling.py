@@ -0,0 +1,61 @@
+# Server-side downsampling for Plotly series.
+#
+# Charts only need a few hundred points to look identical at screen width, so
+# long series are thinned (lines) or bucketed (bars) before they are handed to
+# Plotly.
+
+import numpy as np
+
+
+def lttb_indices(x, y, threshold):
+    """Indices picked by Largest-Triangle-Three-Buckets.
+
+    Keeps the first and last points and, for every bucket in between, the
+    point forming the largest triangle with the previous pick and the mean of
+    the next bucket. Returns all indices when the series is already short.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    every = (n - 2) / (threshold - 2)
+    picked = np.empty(threshold, dtype=np.intp)
+    picked[0] = 0
+    picked[-1] = n - 1
+    a = 0
+    for i in range(threshold - 2):
+        start = int(i * every) + 1
+        stop = int((i + 1) * every) + 1
+        nxt_stop = min(int((i + 2) * every) + 1, n)
+        avg_x = x[stop:nxt_stop].mean()
+        avg_y = y[stop:nxt_stop].mean()
+        area = np.abs((x[a] - avg_x) * (y[start:stop] - y[a]) - (x[a] - x[start:stop]) * (avg_y - y[a]))
+        a = start + int(np.argmax(area))
+        picked[i + 1] = a
+    return picked
+
+
+def lttb(x, y, threshold):
+    # (x, y) thinned to at most ``threshold`` points.
+    idx = lttb_indices(x, y, threshold)
+    return np.asarray(x)[idx], np.asarray(y)[idx]
+
+
+def bucket_sums(x, values, start, width):
+    """Sum the rows of ``values`` over fixed-width buckets of ``x``.
+
+    Buckets are ``[start + i * width, start + (i + 1) * width)``; ``x`` may be
+    numbers or datetime64 (with a timedelta64 ``width``). Returns the start of
+    every non-empty bucket and the per-bucket sums, in order.
+    """
+    ids = ((np.asarray(x) - start) // width).astype(np.intp)
+    values = np.asarray(values, dtype=np.float64)
+    if not len(ids):
+        return start + np.arange(0) * width, np.empty((0, values.shape[1] if values.ndim > 1 else 1))
+    values = values.reshape(len(ids), -1)
+    n = int(ids.max()) + 1
+    sums = np.stack([np.bincount(ids, weights=values[:, j], minlength=n) for j in range(values.shape[1])], axis=1)
+    present = np.flatnonzero(np.bincount(ids, minlength=n))
+    return start + present * width, sums[present]
@@ -0,0 +1,151 @@
+# Packed-array evaluator for the growth RandomForestRegressor.
+#
+# Every tree of a fitted forest is flattened into shared node arrays (feature,
+# threshold, children, leaf value) so a prediction is a handful of NumPy
+# gathers instead of sklearn's validation + per-tree dispatch. Results are
+# bitwise identical to ``model.predict``:
+#   * inputs are cast to float32 before comparing, as sklearn's trees do;
+#   * per-tree outputs are summed sequentially in tree order, then divided by
+#     the number of trees, exactly like RandomForestRegressor.predict.
+#
+#   python forest_predictor.py bench   # parity check + latency numbers
+
+import argparse
+import time
+
+import numpy as np
+
+
+class CompiledForest:
+    """Flattened, read-only copy of a fitted ``RandomForestRegressor``.
+
+    Leaves point to themselves, so walking ``depth`` steps from the roots
+    always ends on a leaf no matter how shallow an individual tree is.
+    """
+
+    def __init__(self, roots, feature, threshold, left, right, value, depth, n_features):
+        self.roots = roots
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.value = value
+        self.depth = depth
+        self.n_features = n_features
+        self.n_trees = len(roots)
+
+    @classmethod
+    def from_model(cls, model):
+        if getattr(model, 'n_outputs_', 1) != 1:
+            raise ValueError("Only single-output forests can be compiled.")
+        features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+        offset = 0
+        depth = 0
+        for estimator in model.estimators_:
+            tree = estimator.tree_
+            n = tree.node_count
+            idx = np.arange(n, dtype=np.intp) + offset
+            leaf = tree.children_left == -1
+            roots.append(offset)
+            features.append(np.where(leaf, 0, tree.feature))
+            thresholds.append(np.where(leaf, 0.0, tree.threshold))
+            lefts.append(np.where(leaf, idx, tree.children_left + offset))
+            rights.append(np.where(leaf, idx, tree.children_right + offset))
+            values.append(tree.value[:, 0, 0])
+            depth = max(depth, tree.max_depth)
+            offset += n
+        return cls(
+            roots=np.asarray(roots, dtype=np.intp),
+            feature=np.concatenate(features).astype(np.intp),
+            threshold=np.concatenate(thresholds).astype(np.float64),
+            left=np.concatenate(lefts).astype(np.intp),
+            right=np.concatenate(rights).astype(np.intp),
+            value=np.concatenate(values).astype(np.float64),
+            depth=depth,
+            n_features=model.n_features_in_,
+        )
+
+    def _leaf_values(self, X):
+        # X is (n_rows, n_features) float32; returns (n_rows, n_trees) leaf values.
+        rows = np.arange(X.shape[0])[:, None]
+        node = np.broadcast_to(self.roots, (X.shape[0], self.n_trees))
+        for _ in range(self.depth):
+            go_left = X[rows, self.feature[node]] <= self.threshold[node]
+            node = np.where(go_left, self.left[node], self.right[node])
+        return self.value[node]
+
+    def predict(self, X):
+        """Predict a batch; ``X`` is any 2-D array-like in training feature order."""
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim != 2 or X.shape[1] != self.n_features:
+            raise ValueError(f"Expected an array of shape (n, {self.n_features}).")
+        # cumsum adds left to right, matching the forest's sequential accumulation.
+        return np.cumsum(self._leaf_values(X), axis=1)[:, -1] / self.n_trees
+
+    def predict_one(self, row):
+        """Predict a single row given as a tuple/list/1-D array."""
+        x = np.asarray(row, dtype=np.float32)
+        if x.shape != (self.n_features,):
+            raise ValueError(f"Expected {self.n_features} feature values.")
+        node = self.roots
+        for _ in range(self.depth):
+            node = np.where(x[self.feature[node]] <= self.threshold[node], self.left[node], self.right[node])
+        return float(np.cumsum(self.value[node])[-1] / self.n_trees)
+
+
+# ------------------ Parity + Latency ------------------
+def _percentiles(timings):
+    us = np.asarray(timings) * 1e6
+    return np.percentile(us, 50), np.percentile(us, 99)
+
+
+def benchmark(model, rows, repeat=2000):
+    import pandas as pd
+
+    compiled = CompiledForest.from_model(model)
+    columns = list(getattr(model, 'feature_names_in_', range(compiled.n_features)))
+
+    expected = model.predict(pd.DataFrame(rows, columns=columns))
+    batch = compiled.predict(rows)
+    single = np.array([compiled.predict_one(r) for r in rows])
+    if not (np.array_equal(expected, batch) and np.array_equal(expected, single)):
+        raise AssertionError("Compiled forest does not match model.predict bit for bit.")
+
+    sample = [tuple(r) for r in rows[:repeat]]
+    results = {}
+    for label, call in (
+        ("sklearn predict (1-row DataFrame)", lambda r: model.predict(pd.DataFrame([r], columns=columns))[0]),
+        ("CompiledForest.predict_one", compiled.predict_one),
+    ):
+        timings = []
+        for r in sample:
+            start = time.perf_counter()
+            call(r)
+            timings.append(time.perf_counter() - start)
+        results[label] = _percentiles(timings)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check and time the compiled growth forest.")
+    parser.add_argument('command', choices=['bench'])
+    parser.add_argument('--rows', type=int, default=2000)
+    args = parser.parse_args(argv)
+
+    import growth
+    data = growth.generate_synthetic_data()
+    model, _ = growth.train_model(data)
+
+    rng = np.random.default_rng(0)
+    age = rng.uniform(0, 18, args.rows)
+    height = rng.uniform(50, 200, args.rows)
+    weight = rng.uniform(5, 100, args.rows)
+    rows = np.column_stack([age, height, weight, weight / (height / 100) ** 2])
+
+    for label, (p50, p99) in benchmark(model, rows).items():
+        print(f"{label:<34} p50 {p50:8.1f} us   p99 {p99:8.1f} us")
+    print(f"Bitwise parity with model.predict on {args.rows} rows: OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,81 @@
+import os
+import hashlib
+from concurrent import futures
 import streamlit as st
 import pandas as pd
 import numpy as np
-from sklearn.ensemble import RandomForestRegressor
-from sklearn.model_selection import train_test_split
-from sklearn.metrics import mean_absolute_error
 import plotly.graph_objects as go
+from scipy.special import ndtr, ndtri
+
+import model_registry
+from forest_predictor import CompiledForest
+from prediction_service import PredictionService
+from downsampling import lttb
+
+# ------------------ WHO Reference Cache ------------------
+WHO_BOYS_FILE = 'hfa-boys-z-who-2007-exp.xlsx'
+WHO_GIRLS_FILE = 'hfa-girls-z-who-2007-exp.xlsx'
+
+
+def _file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 16), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _read_reference_cache(cache_path, stat):
+    """Return (frame, sha256) from a cached .npz, or (None, None) if unusable.
+
+    A matching mtime and size is trusted as-is; otherwise the stored hash is
+    returned so the caller can confirm the source really changed (a fresh
+    checkout rewrites mtimes without touching the content).
+    """
+    try:
+        with np.load(cache_path, allow_pickle=False) as cache:
+            columns = [str(c) for c in cache['columns']]
+            frame = pd.DataFrame({c: cache['col_' + c] for c in columns})
+            stamp_ok = (int(cache['source_mtime_ns']) == stat.st_mtime_ns
+                        and int(cache['source_size']) == stat.st_size)
+            return frame, (None if stamp_ok else str(cache['source_sha256']))
+    except (OSError, KeyError, ValueError):
+        return None, None
+
+
+def _write_reference_cache(cache_path, frame, stat, sha256):
+    arrays = {'col_' + c: frame[c].to_numpy() for c in frame.columns}
+    tmp_path = cache_path + '.tmp.npz'
+    try:
+        np.savez(tmp_path, columns=np.array(frame.columns, dtype=str),
+                 source_mtime_ns=np.int64(stat.st_mtime_ns),
+                 source_size=np.int64(stat.st_size),
+                 source_sha256=np.array(sha256), **arrays)
+        os.replace(tmp_path, cache_path)
+    except OSError:
+        # Read-only deployments just keep parsing the spreadsheet.
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def load_who_reference(path):
+    """Load a WHO spreadsheet, going through a compiled .npz cache next to it."""
+    cache_path = os.path.splitext(path)[0] + '.npz'
+    stat = os.stat(path)
+    frame, cached_sha = _read_reference_cache(cache_path, stat)
+    if frame is not None and cached_sha is None:
+        return frame
+
+    sha256 = _file_sha256(path)
+    if frame is None or cached_sha != sha256:
+        frame = pd.read_excel(path)
+    _write_reference_cache(cache_path, frame, stat, sha256)
+    return frame
+
 
 # Load WHO data
-who_boys = pd.read_excel('hfa-boys-z-who-2007-exp.xlsx')
-who_girls = pd.read_excel('hfa-girls-z-who-2007-exp.xlsx')
+who_boys = load_who_reference(WHO_BOYS_FILE)
+who_girls = load_who_reference(WHO_GIRLS_FILE)
 
 # ------------------ Streamlit UI Config ------------------
 #st.set_page_config(page_title="AI Growth Predictor", page_icon="📈", layout="wide")
@@ -70,14 +137,122 @@ def generate_synthetic_data():
 # ------------------ Model Training ------------------
 @st.cache_resource
 def train_model(data):
-    X = data[['age', 'height', 'weight', 'BMI']]
-    y = data['height']
-    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
-    model = RandomForestRegressor(n_estimators=200, max_depth=12, random_state=42)
-    model.fit(X_train, y_train)
-    y_pred = model.predict(X_test)
-    mae = mean_absolute_error(y_test, y_pred)
-    return model, mae
+    # Loads the persisted model; only retrains when the data/params fingerprint changed.
+    return model_registry.load_or_train(data)
+
+@st.cache_resource
+def load_predictor(data):
+    # Flattened copy of the forest for single-click predictions.
+    model, _ = train_model(data)
+    return CompiledForest.from_model(model)
+
+PREDICT_TIMEOUT = 10  # seconds a session waits for its prediction
+
+@st.cache_resource
+def get_prediction_service(data):
+    # One batching worker shared by every session of this server process.
+    predictor = load_predictor(data)
+    return PredictionService(predictor.predict, n_features=predictor.n_features)
+
+# ------------------ WHO LMS Reference ------------------
+class LMSTable:
+    """WHO height-for-age L, M, S values packed into per-sex arrays indexed by month.
+
+    Row 0 holds boys and row 1 girls; column ``i`` is month ``first_month + i``.
+    Fractional ages are linearly interpolated between neighbouring months and
+    ages outside the table come back as NaN.
+    """
+
+    def __init__(self, first_month, L, M, S):
+        self.first_month = int(first_month)
+        self.L = np.ascontiguousarray(L, dtype=np.float64)
+        self.M = np.ascontiguousarray(M, dtype=np.float64)
+        self.S = np.ascontiguousarray(S, dtype=np.float64)
+        self.last_month = self.first_month + self.L.shape[1] - 1
+
+    @classmethod
+    def from_frames(cls, boys, girls):
+        boys = boys.sort_values('Month')
+        girls = girls.sort_values('Month')
+        months = boys['Month'].to_numpy()
+        if not np.array_equal(months, girls['Month'].to_numpy()):
+            raise ValueError("WHO boys and girls tables must cover the same months.")
+        if np.any(np.diff(months) != 1):
+            raise ValueError("WHO table months must be contiguous.")
+        stack = lambda col: np.vstack([boys[col].to_numpy(), girls[col].to_numpy()])
+        return cls(months[0], stack('L'), stack('M'), stack('S'))
+
+    @staticmethod
+    def sex_index(gender):
+        # Anything other than 'Male' uses the girls' table, as before.
+        return np.where(np.asarray(gender) == 'Male', 0, 1)
+
+    def lms(self, age_months, gender):
+        """Vectorized L, M, S for arrays of ages (months) and genders."""
+        age_months = np.asarray(age_months, dtype=np.float64)
+        sex = self.sex_index(gender)
+        age_months, sex = np.broadcast_arrays(age_months, sex)
+
+        pos = age_months - self.first_month
+        n = self.L.shape[1]
+        valid = (pos >= 0) & (pos <= n - 1)
+        i0 = np.clip(np.floor(np.where(valid, pos, 0)), 0, n - 2).astype(np.intp)
+        frac = np.where(valid, pos - i0, 0.0)
+
+        out = []
+        for arr in (self.L, self.M, self.S):
+            lo = arr[sex, i0]
+            hi = arr[sex, i0 + 1]
+            value = lo * (1 - frac) + hi * frac
+            out.append(np.where(valid, value, np.nan))
+        return tuple(out)
+
+    def lookup(self, age_months, gender):
+        """Scalar L, M, S for one child; (None, None, None) outside the table."""
+        pos = age_months - self.first_month
+        if pos < 0 or pos > self.L.shape[1] - 1:
+            return None, None, None
+        sex = 0 if gender == 'Male' else 1
+        if pos == int(pos):
+            i = int(pos)
+            return float(self.L[sex, i]), float(self.M[sex, i]), float(self.S[sex, i])
+        L, M, S = self.lms(age_months, gender)
+        return L.item(), M.item(), S.item()
+
+
+def lms_height(L, M, S, z):
+    """Height at z-score ``z`` from LMS parameters (vectorized, handles L == 0)."""
+    L, M, S, z = np.broadcast_arrays(*(np.asarray(v, dtype=np.float64) for v in (L, M, S, z)))
+    safe_L = np.where(L == 0, 1.0, L)
+    box_cox = M * (1 + safe_L * S * z) ** (1 / safe_L)
+    return np.where(L == 0, M * np.exp(S * z), box_cox)
+
+
+def lms_zscore(L, M, S, height):
+    """Inverse of ``lms_height``: z-score of ``height`` (vectorized, handles L == 0)."""
+    L, M, S, height = np.broadcast_arrays(*(np.asarray(v, dtype=np.float64) for v in (L, M, S, height)))
+    safe_L = np.where(L == 0, 1.0, L)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        ratio = height / M
+        box_cox = (ratio ** safe_L - 1) / (safe_L * S)
+        return np.where(L == 0, np.log(ratio) / S, box_cox)
+
+
+LMS_TABLE = LMSTable.from_frames(who_boys, who_girls)
+
+
+def height_for_age_zscore(age_months, gender, height):
+    """Height-for-age z-scores for arrays of ages (months), genders and heights (cm).
+
+    NaN where the age falls outside the WHO table.
+    """
+    L, M, S = LMS_TABLE.lms(age_months, gender)
+    return lms_zscore(L, M, S, height)
+
+
+def height_for_age_percentile(age_months, gender, height):
+    return ndtr(height_for_age_zscore(age_months, gender, height)) * 100
+
 
 def get_lms_parameters(age, gender):
     # Convert age from years to months
@@ -92,39 +267,23 @@ def get_lms_parameters(age, gender):
         print(f"Age out of range for WHO data. Valid age range is {min_age_months // 12} to {max_age_months // 12} years.")
         return None, None, None
 
-    # Select the dataset based on gender
-    if gender == 'Male':
-        data = who_boys
-    else:
-        data = who_girls
-
-    # Find the corresponding row for the given age in months
-    row = data[data['Month'] == age_in_months]
-    
-    if not row.empty:
-        # Extract the L, M, and S values
-        L = row['L'].values[0]
-        M = row['M'].values[0]
-        S = row['S'].values[0]
-        return L, M, S
-    else:
+    L, M, S = LMS_TABLE.lookup(age_in_months, gender)
+    if L is None:
         print("No data available for the specified age.")
-        return None, None, None
+    return L, M, S
 
 
 def calculate_expected_height_range(age, gender):
+    if np.ndim(age) or np.ndim(gender):
+        # Batch path: arrays of ages (years) and genders, NaN where out of range.
+        L, M, S = LMS_TABLE.lms(np.asarray(age, dtype=np.float64) * 12, gender)
+        return lms_height(L, M, S, -2), lms_height(L, M, S, 2)
+
     L, M, S = get_lms_parameters(age, gender)
     if L is None:
         return None, None
-    z_scores = [-2, 2]  # For ±2 standard deviations
-    heights = []
-    for z in z_scores:
-        if L != 0:
-            height = M * ((1 + L * S * z) ** (1 / L))
-        else:
-            height = M * np.exp(S * z)
-        heights.append(height)
-    return heights[0], heights[1]
+    low, high = lms_height(L, M, S, [-2, 2])  # For ±2 standard deviations
+    return float(low), float(high)
 
 def check_growth_abnormality(predicted_height, age, gender):
     # Calculate the expected height range for the given age and gender
@@ -134,23 +293,26 @@ def check_growth_abnormality(predicted_height, age, gender):
     if min_height is None:
         return "❌ Age out of range for WHO data. Please provide an age between 6 and 19 years."
     
+    z = height_for_age_zscore(age * 12, gender, predicted_height).item()
+    z_line = f"\n📏 Height-for-age z-score: {z:+.2f} (percentile {ndtr(z) * 100:.0f})"
+
     # Check for undergrowth
     if predicted_height < min_height:
         return (f"⚠️ Abnormal Growth: Predicted height is {predicted_height:.2f} cm.\n"
                     f"Expected range: {min_height:.2f} - {max_height:.2f} cm.\n"
-                    f"🩺 Possible UNDERGROWTH. Please consult a healthcare provider.")
+                    f"🩺 Possible UNDERGROWTH. Please consult a healthcare provider.{z_line}")
     
     # Check for overgrowth
     elif predicted_height > max_height:
         return (f"⚠️ Abnormal Growth: Predicted height is {predicted_height:.2f} cm.\n"
                     f"Expected range: {min_height:.2f} - {max_height:.2f} cm.\n"
-                    f"🩺 Possible OVERGROWTH. Please consult a healthcare provider.")
+                    f"🩺 Possible OVERGROWTH. Please consult a healthcare provider.{z_line}")
     
     # Normal growth
     else:
         return (f"✅ Growth is NORMAL: Predicted height is {predicted_height:.2f} cm.\n"
                     f"Within the expected range: {min_height:.2f} - {max_height:.2f} cm.\n"
-                    f"👍 Keep up the good growth!")
+                    f"👍 Keep up the good growth!{z_line}")
     
 # ------------------ BMI Category ------------------
 def bmi_category(bmi):
@@ -163,6 +325,97 @@ def bmi_category(bmi):
     else:
         return "Overweight"
 
+BMI_CATEGORIES = np.array(["Underweight", "Normal", "Slightly Overweight", "Overweight"])
+
+def bmi_categories(bmi):
+    # Vectorized bmi_category: same cut points, one array in, one array out.
+    return BMI_CATEGORIES[np.searchsorted([14, 18, 21], np.asarray(bmi), side='right')]
+
+# ------------------ Batch Growth Status ------------------
+GROWTH_STATUSES = np.array(["Undergrowth", "Normal", "Overgrowth", "Out of range"])
+
+def classify_growth(predicted_height, age, gender):
+    # Vectorized check_growth_abnormality: returns (status, min_height, max_height) arrays.
+    min_height, max_height = calculate_expected_height_range(np.atleast_1d(np.asarray(age, dtype=np.float64)), np.asarray(gender))
+    predicted_height = np.asarray(predicted_height, dtype=np.float64)
+    code = np.where(predicted_height < min_height, 0, np.where(predicted_height > max_height, 2, 1))
+    code = np.where(np.isnan(min_height), 3, code)
+    return GROWTH_STATUSES[code], min_height, max_height
+
+# ------------------ WHO Reference Curves ------------------
+SD_LEVELS = np.arange(-3, 4)
+PERCENTILES = np.array([3, 15, 50, 85, 97])
+MAX_CHART_POINTS = 300
+
+@st.cache_resource
+def reference_curves():
+    # Heights at every SD level and percentile for every table month, per sex.
+    months = np.arange(LMS_TABLE.first_month, LMS_TABLE.last_month + 1)
+    curves = {"months": months, "sd": {}, "percentile": {}}
+    for gender in ('Male', 'Female'):
+        L, M, S = LMS_TABLE.lms(months, gender)
+        curves["sd"][gender] = lms_height(L, M, S, SD_LEVELS[:, None])
+        curves["percentile"][gender] = lms_height(L, M, S, ndtri(PERCENTILES / 100)[:, None])
+    return curves
+
+@st.cache_resource
+def reference_chart(gender, max_points=MAX_CHART_POINTS):
+    # Base figure with the WHO bands; callers copy it and add the child's points.
+    curves = reference_curves()
+    years = curves["months"] / 12
+    fig = go.Figure()
+    for level, heights in zip(SD_LEVELS, curves["sd"][gender]):
+        x, y = lttb(years, heights, max_points)
+        fig.add_trace(go.Scattergl(
+            x=x, y=y, mode='lines',
+            name='Median' if level == 0 else f'{level:+d} SD',
+            line=dict(color='seagreen' if level == 0 else 'royalblue' if abs(level) < 3 else 'firebrick',
+                      width=2 if level == 0 else 1, dash='solid' if level == 0 else 'dot'),
+            hoverinfo='skip' if level else None
+        ))
+    for p, heights in zip(PERCENTILES, curves["percentile"][gender]):
+        x, y = lttb(years, heights, max_points)
+        fig.add_trace(go.Scattergl(
+            x=x, y=y, mode='lines', name=f'P{p}',
+            line=dict(color='gray', width=1), opacity=0.4, visible='legendonly'
+        ))
+    fig.update_layout(
+        title="📉 Growth Comparison Chart",
+        xaxis_title="Age (Years)",
+        yaxis_title="Height (cm)",
+        template="plotly_white",
+        height=500
+    )
+    return fig
+
+def growth_chart(gender, history=(), predicted=None, max_points=MAX_CHART_POINTS):
+    # WHO bands plus the child's measurements (downsampled) and the prediction.
+    # Measurements outside the WHO table's age range are left off.
+    fig = go.Figure(reference_chart(gender, max_points))
+    points = np.asarray(history, dtype=np.float64).reshape(-1, 2)
+    months = points[:, 0] * 12
+    points = points[(months >= LMS_TABLE.first_month) & (months <= LMS_TABLE.last_month)]
+    if len(points):
+        ages, heights = points.T
+        order = np.argsort(ages, kind='stable')
+        ages, heights = lttb(ages[order], heights[order], max_points)
+        fig.add_trace(go.Scattergl(
+            x=ages, y=heights, mode='lines+markers', name='Measured Height',
+            marker=dict(color='black', size=6)
+        ))
+    if predicted is not None:
+        age, predicted_height = predicted
+        fig.add_trace(go.Scatter(
+            x=[age],
+            y=[predicted_height],
+            mode='markers+text',
+            name='Predicted Height',
+            marker=dict(color='red', size=14),
+            text=[f'{predicted_height:.2f} cm'],
+            textposition='top center'
+        ))
+    return fig
+
 # ------------------ Main App ------------------
 def main():
     st.markdown("""
@@ -227,8 +480,11 @@ def main():
     bmi_status = bmi_category(bmi)
 
     if st.sidebar.button('🔍 Predict Growth'):
-        input_data = pd.DataFrame({'age': [age], 'height': [height], 'weight': [weight], 'BMI': [bmi]})
-        predicted_height = model.predict(input_data)[0]
+        try:
+            predicted_height = get_prediction_service(data).predict((age, height, weight, bmi), PREDICT_TIMEOUT)
+        except futures.TimeoutError:
+            st.error("⏳ The prediction service is busy, please try again.")
+            st.stop()
 
         # Display Results
         st.markdown(f"### 📐 **Predicted Height at Age {age + 1}:** `{predicted_height:.2f} cm`")
@@ -242,42 +498,14 @@ def main():
         else:
             st.markdown(f'<div class="normal">{alert_message}</div>', unsafe_allow_html=True)
 
-        # Plotly Chart
-        fig = go.Figure()
-
-                # Predicted height marker
-        fig.add_trace(go.Scatter(
-            x=[age],
-            y=[predicted_height],
-            mode='markers+text',
-            name='Predicted Height',
-            marker=dict(color='red', size=14),
-            text=[f'{predicted_height:.2f} cm'],
-            textposition='top center'
-        ))
-
-        fig.update_layout(
-            title="📉 Growth Comparison Chart",
-            xaxis_title="Age (Years)",
-            yaxis_title="Height (cm)",
-            template="plotly_white",
-            height=500
-        )
-
+        # Plotly Chart: WHO bands, this session's measurements and the prediction
+        # One measurement per age and sex: re-predicting replaces it, a new sex starts its own curve.
+        histories = st.session_state.setdefault('growth_history', {})
+        history = histories.setdefault(gender, {})
+        history[age] = height
+        fig = growth_chart(gender, sorted(history.items()), predicted=(age + 1, predicted_height))
         st.plotly_chart(fig, use_container_width=True)
 
-        # Use the function to get the expected height range
-        min_height, max_height = calculate_expected_height_range(age, gender)
-
-        if min_height is not None and max_height is not None:
-            fig.add_trace(go.Scatter(
-                x=[age, age],
-                y=[min_height, max_height],
-                mode='lines',
-                name='Expected Height Range',
-                line=dict(color='royalblue', dash='dot')
-            ))
-
         # Optional: Display gauge chart
         fig = go.Figure(go.Indicator(
             mode="gauge+number+delta",
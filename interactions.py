@@ -0,0 +1,174 @@
+# Drug-interaction lookups over a large pair table.
+#
+# Drug names are normalized ("Paracetamol 250mg" -> "paracetamol") and coded
+# as integers. Pairs are stored both ways in a CSR adjacency index, so a
+# selection -- or the whole inventory -- is checked in time proportional to
+# the interactions of the drugs involved instead of every pair of them.
+#
+# The table is read from drug_interactions.csv when present: the first two
+# columns are the two drugs, an optional "description" column is shown to the
+# user. Without the file the small built-in list is used.
+#
+#   python interactions.py bench   # build/query timings on a synthetic catalog
+
+import argparse
+import os
+import re
+import time
+
+import numpy as np
+import pandas as pd
+
+INTERACTIONS_FILE = "drug_interactions.csv"
+
+BUILTIN_INTERACTIONS = [
+    ("Amoxicillin", "Warfarin"),
+    ("Ciprofloxacin", "Antacids"),
+    ("Ibuprofen", "Aspirin"),
+]
+
+_UNIT_WORDS = {"mg", "mcg", "g", "ml", "tab", "tabs", "tablet", "tablets", "cap", "caps",
+               "capsule", "capsules", "syrup", "drops", "iu", "daily"}
+_DOSE = re.compile(r"\d+[a-z]*")
+
+
+def normalize_name(name):
+    # Lowercase, drop bracketed notes, doses and units, collapse whitespace.
+    text = re.sub(r"\(.*?\)", " ", str(name).lower())
+    tokens = re.findall(r"[a-z0-9]+", text)
+    kept = [t for t in tokens if not _DOSE.fullmatch(t) and t not in _UNIT_WORDS]
+    return " ".join(kept)
+
+
+class InteractionIndex:
+    """Symmetric interaction graph in CSR form over integer drug IDs."""
+
+    def __init__(self, pairs, descriptions=None):
+        self.ids = {}
+        self.names = []
+        self._raw_codes = {}
+        a = np.fromiter((self._code(x) for x, _ in pairs), dtype=np.int64, count=len(pairs))
+        b = np.fromiter((self._code(y) for _, y in pairs), dtype=np.int64, count=len(pairs))
+        if descriptions is None:
+            descriptions = [""] * len(pairs)
+        descriptions = np.asarray(descriptions, dtype=object)
+
+        keep = a != b
+        src = np.concatenate([a[keep], b[keep]])
+        dst = np.concatenate([b[keep], a[keep]])
+        desc = np.concatenate([descriptions[keep], descriptions[keep]])
+
+        # Sort by (src, dst) and drop duplicate edges, keeping the first description.
+        order = np.lexsort((dst, src))
+        src, dst, desc = src[order], dst[order], desc[order]
+        unique = np.ones(len(src), dtype=bool)
+        unique[1:] = (src[1:] != src[:-1]) | (dst[1:] != dst[:-1])
+        src, dst, desc = src[unique], dst[unique], desc[unique]
+
+        n = len(self.names)
+        self.indptr = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(src, minlength=n), out=self.indptr[1:])
+        self.indices = dst
+        self.descriptions = desc
+
+    @staticmethod
+    def _key(name):
+        # Names that are nothing but a dose fall back to their raw lowercase form.
+        return normalize_name(name) or str(name).strip().lower()
+
+    def _code(self, name):
+        code = self._raw_codes.get(name)
+        if code is None:
+            key = self._key(name)
+            code = self.ids.get(key)
+            if code is None:
+                code = self.ids[key] = len(self.names)
+                self.names.append(str(name))
+            self._raw_codes[name] = code
+        return code
+
+    @classmethod
+    def from_file(cls, path=INTERACTIONS_FILE):
+        table = pd.read_csv(path, dtype=str, keep_default_na=False)
+        descriptions = table["description"].tolist() if "description" in table.columns else None
+        pairs = list(zip(table.iloc[:, 0], table.iloc[:, 1]))
+        return cls(pairs, descriptions)
+
+    @classmethod
+    def load(cls, path=INTERACTIONS_FILE):
+        if os.path.exists(path):
+            return cls.from_file(path)
+        return cls(BUILTIN_INTERACTIONS)
+
+    def __len__(self):
+        return len(self.indices) // 2
+
+    def lookup(self, names):
+        # Drug IDs for the names we know; unknown names are skipped.
+        codes = (self.ids.get(self._key(n)) for n in names)
+        return np.array(sorted({c for c in codes if c is not None}), dtype=np.int64)
+
+    def check(self, names):
+        """All interacting pairs among ``names`` as (name, name, description) tuples.
+
+        Names are echoed back as given so the UI shows the user's spelling.
+        """
+        names = list(names)
+        display = {}
+        for name in names:
+            display.setdefault(self.ids.get(self._key(name)), name)
+        ids = self.lookup(names)
+        if not len(ids):
+            return []
+
+        mask = np.zeros(len(self.names), dtype=bool)
+        mask[ids] = True
+        starts = self.indptr[ids]
+        lengths = self.indptr[ids + 1] - starts
+        src = np.repeat(ids, lengths)
+        # Position of every neighbour of every selected drug in ``indices``.
+        offsets = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths) + np.repeat(starts, lengths)
+        dst = self.indices[offsets]
+        hit = mask[dst] & (src < dst)
+        return [(display[s], display[d], desc) for s, d, desc in
+                zip(src[hit].tolist(), dst[hit].tolist(), self.descriptions[offsets[hit]])]
+
+
+# ------------------ Benchmark ------------------
+def benchmark(n_drugs=50_000, n_pairs=500_000, inventory=5_000, seed=0):
+    rng = np.random.default_rng(seed)
+    names = [f"Drug{i:06d}" for i in range(n_drugs)]
+    a = rng.integers(0, n_drugs, n_pairs)
+    b = rng.integers(0, n_drugs, n_pairs)
+    pairs = [(names[x], names[y]) for x, y in zip(a, b)]
+
+    start = time.perf_counter()
+    index = InteractionIndex(pairs)
+    build = time.perf_counter() - start
+
+    results = {"build_s": build, "pairs": len(index)}
+    for label, size in (("selection_10", 10), ("inventory", inventory)):
+        chosen = [names[i] for i in rng.choice(n_drugs, size, replace=False)]
+        start = time.perf_counter()
+        found = index.check(chosen)
+        results[f"{label}_ms"] = (time.perf_counter() - start) * 1e3
+        results[f"{label}_hits"] = len(found)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Drug-interaction index tools.")
+    parser.add_argument('command', choices=['bench'])
+    parser.add_argument('--drugs', type=int, default=50_000)
+    parser.add_argument('--pairs', type=int, default=500_000)
+    parser.add_argument('--inventory', type=int, default=5_000)
+    args = parser.parse_args(argv)
+
+    r = benchmark(args.drugs, args.pairs, args.inventory)
+    print(f"build {r['pairs']} unique pairs over {args.drugs} drugs: {r['build_s']:.2f}s")
+    print(f"check 10 selected drugs:        {r['selection_10_ms']:.3f} ms ({r['selection_10_hits']} hits)")
+    print(f"check {args.inventory} inventory drugs:    {r['inventory_ms']:.3f} ms ({r['inventory_hits']} hits)")
+
+
+if __name__ == "__main__":
+    main()
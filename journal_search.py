@@ -0,0 +1,317 @@
+# Full-text search over mood journal entries.
+#
+# JournalIndex keeps an inverted index of the Journal column next to the log,
+# in mood_data.search.db: a contentless SQLite FTS5 table maps each token to
+# the posting list of entries containing it (with positions, for phrases),
+# and every entry is identified by its byte offset in mood_data.csv. A second
+# table holds each entry's date, indexed, for date-range queries. Like
+# MoodHistory, refresh() only parses records appended since the last one, so
+# saving an entry costs one small insert; a replaced log is indexed again from
+# scratch. Queries touch the index only and read the matching records from the
+# log by offset.
+#
+#   python journal_search.py search "park" "best day" --start 2025-05-01
+#   python journal_search.py bench --entries 1000000
+
+import argparse
+import csv
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from log_tail import complete_records, head_hash, split_records
+from mood_history import DATE_FORMAT, MOOD_FILE
+from sqlite_local import LocalConnection
+
+RESULTS = 50
+_CHUNK_BYTES = 16 << 20  # log bytes indexed per transaction
+_DAY = re.compile(r"\d{4}-\d{2}-\d{2}")
+_TERM = re.compile(r'"([^"]*)"|(\S+)')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    offset INTEGER PRIMARY KEY,
+    date TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_entries_date ON entries (date);
+CREATE VIRTUAL TABLE IF NOT EXISTS journal USING fts5(text, content='', tokenize='unicode61 remove_diacritics 2');
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+"""
+
+
+def match_query(text):
+    """FTS5 query for user input: every word must appear, "quoted text" as a phrase, word* as a prefix."""
+    terms = []
+    for phrase, word in _TERM.findall(text):
+        prefix = bool(word) and word.endswith("*")
+        term = (phrase or word.rstrip("*")).replace('"', '""')
+        if re.search(r"\w", term):
+            terms.append(f'"{term}"' + ("*" if prefix else ""))
+    return " AND ".join(terms)
+
+
+class JournalIndex:
+    """Persistent inverted index of mood journal entries, keyed by log offset."""
+
+    def __init__(self, path=MOOD_FILE, index_path=None):
+        self.path = path
+        self.index_path = index_path or os.path.splitext(path)[0] + ".search.db"
+        self._db = LocalConnection(self.index_path)
+        self._lock = threading.Lock()
+        with self._db.connect() as conn:
+            conn.executescript(_SCHEMA)
+
+    def _meta(self, conn):
+        return {k: json.loads(v) for k, v in conn.execute("SELECT key, value FROM meta")}
+
+    # ------------------ Indexing ------------------
+    def refresh(self):
+        """Index records appended since the last refresh (by any process); returns how many."""
+        indexed = 0
+        with self._lock:
+            while True:
+                added = self._index_chunk()
+                if added is None:
+                    return indexed
+                indexed += added
+
+    def _index_chunk(self):
+        # One transaction: the next chunk of the log, or None once caught up.
+        conn = self._db.connect()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")  # re-read the offset only once we are the sole indexer
+            meta = self._meta(conn)
+            offset = meta.get("offset", 0)
+            try:
+                st = os.stat(self.path)
+            except FileNotFoundError:
+                st = None
+            replaced = offset and (st is None or st.st_ino != meta.get("inode") or st.st_size < offset
+                                   or head_hash(self.path, offset) != meta.get("head"))
+            if replaced:  # e.g. rescored: offsets moved, start over
+                conn.execute("DELETE FROM entries")
+                conn.execute("INSERT INTO journal (journal) VALUES ('delete-all')")
+                conn.execute("DELETE FROM meta")
+                meta, offset = {}, 0
+            if st is None or st.st_size == offset:
+                return 0 if replaced else None
+
+            with open(self.path, "rb") as f:
+                f.seek(offset)
+                chunk = complete_records(f.read(min(st.st_size - offset, _CHUNK_BYTES)))
+            if not chunk:
+                return 0 if replaced else None
+            records = split_records(chunk, offset)
+            columns = meta.get("columns")
+            if columns is None:
+                columns = next(csv.reader([records.pop(0)[1].decode("utf-8")]))
+            date_col, text_col = columns.index("Date"), columns.index("Journal")
+
+            entries, texts = [], []
+            last_date, ordered = meta.get("last_date", ""), meta.get("ordered", True)
+            rows = csv.reader(record.decode("utf-8", errors="replace") for _, record in records)
+            for (at, _), row in zip(records, rows):
+                if len(row) <= max(date_col, text_col):
+                    continue  # blank or torn line
+                date = row[date_col] if _DAY.match(row[date_col]) else ""
+                if date:
+                    ordered = ordered and date >= last_date
+                    last_date = max(date, last_date)
+                entries.append((at, date))
+                texts.append((at, row[text_col]))
+            conn.executemany("INSERT OR REPLACE INTO entries VALUES (?, ?)", entries)
+            conn.executemany("INSERT INTO journal (rowid, text) VALUES (?, ?)", texts)
+
+            offset += len(chunk)
+            meta.update(offset=offset, columns=columns, inode=st.st_ino, head=head_hash(self.path, offset),
+                        last_date=last_date, ordered=ordered)
+            conn.executemany("INSERT OR REPLACE INTO meta VALUES (?, ?)",
+                             [(k, json.dumps(v)) for k, v in meta.items()])
+            return len(entries)
+
+    # ------------------ Querying ------------------
+    def count(self):
+        return self._db.connect().execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    def _offset_bounds(self, conn, lo, hi, ordered):
+        # Smallest and largest offset of entries dated in [lo, hi), from the date index.
+        if ordered:  # dates only ever grew: offset order is date order
+            first = conn.execute("SELECT offset FROM entries WHERE date >= ? AND date < ? "
+                                 "ORDER BY date, offset LIMIT 1",
+                                 (lo, hi)).fetchone()
+            last = conn.execute("SELECT offset FROM entries WHERE date >= ? AND date < ? "
+                                "ORDER BY date DESC, offset DESC LIMIT 1",
+                                (lo, hi)).fetchone()
+            return (first[0], last[0]) if first else (None, None)
+        return conn.execute("SELECT MIN(offset), MAX(offset) FROM entries WHERE date >= ? AND date < ?",
+                            (lo, hi)).fetchone()
+
+    def offsets(self, query="", start=None, end=None, limit=RESULTS):
+        """Log offsets of the newest entries matching ``query`` and dated ``start``..``end`` (days, inclusive)."""
+        match = match_query(query)
+        if query.strip() and not match:
+            return []  # nothing searchable, e.g. only punctuation
+        conn = self._db.connect()
+        if start is None and end is None:
+            if not match:
+                sql, params = "SELECT offset FROM entries ORDER BY offset DESC LIMIT ?", ()
+            else:
+                sql, params = "SELECT rowid FROM journal WHERE journal MATCH ? ORDER BY rowid DESC LIMIT ?", (match,)
+            return [r[0] for r in conn.execute(sql, params + (limit,))]
+
+        lo = pd.Timestamp(start).strftime("%Y-%m-%d") if start is not None else ""
+        hi = (pd.Timestamp(end) + pd.Timedelta(days=1)).strftime("%Y-%m-%d") if end is not None else "9999"
+        ordered = conn.execute("SELECT value FROM meta WHERE key = 'ordered'").fetchone()
+        first, last = self._offset_bounds(conn, lo, hi, ordered is None or json.loads(ordered[0]))
+        if first is None:
+            return []
+        # The offset bounds let both scans start at the right place; the date test keeps them exact.
+        if not match:
+            sql = ("SELECT offset FROM entries WHERE offset BETWEEN ? AND ? AND +date >= ? AND +date < ? "
+                   "ORDER BY offset DESC LIMIT ?")
+            params = (first, last, lo, hi, limit)
+        else:
+            sql = ("SELECT j.rowid FROM journal j CROSS JOIN entries e ON e.offset = j.rowid "
+                   "WHERE journal MATCH ? AND j.rowid BETWEEN ? AND ? AND e.date >= ? AND e.date < ? "
+                   "ORDER BY j.rowid DESC LIMIT ?")
+            params = (match, first, last, lo, hi, limit)
+        return [r[0] for r in conn.execute(sql, params)]
+
+    def read(self, offsets):
+        """The log records at ``offsets`` as a DataFrame in the log's columns."""
+        saved = self._db.connect().execute("SELECT value FROM meta WHERE key = 'columns'").fetchone()
+        columns = json.loads(saved[0]) if saved else []
+        rows = []
+        with open(self.path, "rb") as f:
+            for offset in offsets:
+                f.seek(offset)
+                data = b""
+                while True:
+                    more = f.read(4096)
+                    data += more
+                    records = split_records(data)
+                    if records or not more:
+                        break
+                text = (records[0][1] if records else data).decode("utf-8", errors="replace")
+                row = next(csv.reader([text]), [])
+                rows.append((row + [""] * len(columns))[:len(columns)])
+        frame = pd.DataFrame(rows, columns=columns)
+        if "Date" in frame:
+            frame["Date"] = pd.to_datetime(frame["Date"], format=DATE_FORMAT, errors="coerce")
+        return frame
+
+    def search(self, query="", start=None, end=None, limit=RESULTS):
+        """Newest entries matching ``query`` in the date range, read back from the log."""
+        return self.read(self.offsets(query, start, end, limit))
+
+
+# ------------------ Benchmark ------------------
+_COMMON = ["i", "had", "a", "day", "at", "school", "the", "park", "with", "my", "friends", "and", "was",
+           "good", "bad", "happy", "sad", "tired", "fun", "best", "ever", "homework", "lunch", "mum", "dad"]
+
+
+def synthetic_journal(path, n_entries, years=5, seed=0):
+    # Zipf-distributed vocabulary: a few very common words and a long tail of rare ones.
+    rng = np.random.default_rng(seed)
+    vocab = np.array(_COMMON + [f"word{i}" for i in range(50_000)])
+    lengths = rng.integers(4, 25, n_entries)
+    words = np.minimum(rng.zipf(1.3, lengths.sum()) - 1, len(vocab) - 1)
+    bounds = np.cumsum(lengths)
+    journals = [" ".join(vocab[words[end - n:end]]) for n, end in zip(lengths, bounds)]
+    for i in range(0, n_entries, 1000):
+        journals[i] += " best day ever"  # a known phrase, once per 1,000 entries
+    minutes = np.sort(rng.integers(0, years * 365 * 24 * 60, n_entries))
+    dates = pd.Timestamp("2020-01-01") + pd.to_timedelta(minutes, unit="min")
+    pd.DataFrame({
+        "Date": dates.strftime(DATE_FORMAT), "Mood": "Neutral", "Emoji": "😐", "Polarity": 0.0,
+        "Sleep": 8, "Screen Time": 2, "Appetite": "Good", "Journal": journals,
+    }).to_csv(path, index=False)
+
+
+_QUERIES = [
+    ("rare word", "word4000", None, None),
+    ("common word", "park", None, None),
+    ("phrase", '"best day ever"', None, None),
+    ("two words", "homework tired", None, None),
+    ("word + month", "park", "2022-03-01", "2022-03-31"),
+    ("rare word + year", "word4000", "2021-01-01", "2021-12-31"),
+    ("month only", "", "2022-03-01", "2022-03-31"),
+]
+
+
+def _median_ms(fn, repeat=20):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return float(np.median(times)) * 1e3
+
+
+def benchmark(n_entries=1_000_000, limit=RESULTS):
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "mood_data.csv")
+        synthetic_journal(path, n_entries)
+        index = JournalIndex(path)
+        start = time.perf_counter()
+        index.refresh()
+        results["build_s"] = time.perf_counter() - start
+        results["index_mb"] = os.path.getsize(index.index_path) / 1e6
+        results["log_mb"] = os.path.getsize(path) / 1e6
+
+        with open(path, "a", encoding="utf-8", newline="") as f:
+            f.write("2026-01-01 09:00,Happy,😀,0.8,9,1,Good,one more entry\n")
+        start = time.perf_counter()
+        index.refresh()
+        results["append_ms"] = (time.perf_counter() - start) * 1e3
+
+        results["queries"] = [(name, query, start_day, end_day,
+                               _median_ms(lambda: index.search(query, start_day, end_day, limit)),
+                               len(index.offsets(query, start_day, end_day, limit)))
+                              for name, query, start_day, end_day in _QUERIES]
+
+        # What a keyword search needs without the index: load the log and scan every journal.
+        start = time.perf_counter()
+        df = pd.read_csv(path, dtype={"Journal": str})
+        df[df["Journal"].str.contains(r"\bpark\b", regex=True, na=False)].tail(limit)
+        results["scan_s"] = time.perf_counter() - start
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Search mood journal entries.")
+    sub = parser.add_subparsers(dest='command', required=True)
+    s = sub.add_parser('search', help="refresh the index and print matching entries")
+    s.add_argument('query', nargs='*', help='words, "quoted phrases" and prefix* terms')
+    s.add_argument('--path', default=MOOD_FILE)
+    s.add_argument('--start')
+    s.add_argument('--end')
+    s.add_argument('--limit', type=int, default=RESULTS)
+    b = sub.add_parser('bench', help="build time and query latency on a synthetic journal")
+    b.add_argument('--entries', type=int, default=1_000_000)
+    args = parser.parse_args(argv)
+
+    if args.command == 'search':
+        index = JournalIndex(args.path)
+        index.refresh()
+        query = " ".join(f'"{q}"' if " " in q else q for q in args.query)
+        print(index.search(query, args.start, args.end, args.limit).to_string(index=False))
+    else:
+        r = benchmark(args.entries)
+        print(f"{args.entries:,} entries ({r['log_mb']:.0f} MB log): index built in {r['build_s']:.1f}s, "
+              f"{r['index_mb']:.0f} MB; indexing one appended entry {r['append_ms']:.1f} ms")
+        for name, query, start_day, end_day, ms, hits in r["queries"]:
+            days = f" {start_day}..{end_day}" if start_day else ""
+            print(f"  {name:<18} {query!r:<18}{days:<24} {ms:7.2f} ms  ({hits} results)")
+        print(f"  pandas full scan for 'park': {r['scan_s']:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
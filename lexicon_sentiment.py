@@ -0,0 +1,157 @@
+# Built-in lexicon sentiment engine.
+#
+# A compact re-implementation of the pattern/TextBlob polarity algorithm over
+# a precompiled lexicon, sentiment_lexicon.json (word -> polarity, intensity,
+# compiled from TextBlob's en-sentiment.xml). Known words are scored and
+# averaged; an adverb ("very good") scales the next word by its intensity, a
+# negation ("not good") flips and halves it, "!" boosts the previous word and
+# emoticons count as words. Loading is a small JSON read instead of importing
+# TextBlob and parsing its XML.
+#
+#   python lexicon_sentiment.py compile    # rebuild the lexicon (needs textblob)
+
+import argparse
+import json
+import os
+import re
+
+LEXICON_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "sentiment_lexicon.json")
+NEGATIONS = frozenset(("no", "not", "n't", "never"))
+
+# Tokenization follows pattern's find_tokens closely enough to score alike.
+_PUNCTUATION = ".,;:!?()[]{}`''\"@#$^&*+-|=~_"
+_LEADING = tuple(_PUNCTUATION.replace(".", ""))
+_TRAILING = _LEADING + (".",)
+_CONTRACTIONS = [("'d", " 'd"), ("'m", " 'm"), ("'s", " 's"), ("'ll", " 'll"), ("'re", " 're"),
+                 ("'ve", " 've"), ("n't", " n't")]
+_QUOTES = str.maketrans({q: f" {q} " for q in "“”‘’'\""})
+_ABBREVIATION = re.compile(r"^([A-Za-z]\.)+$|^[A-Z][bcdfghjklmnpqrstvwxz|]+.$")
+_SARCASM = re.compile(r"\( ?\! ?\)")
+
+EMOTICONS = {
+    +1.00: ("<3", "♥", ">:D", ":-D", ":D", "=-D", "=D", "X-D", "x-D", "XD", "xD", "8-D"),
+    +0.75: (">:P", ":-P", ":P", ":-p", ":p", ":-b", ":b", ":c)", ":o)", ":^)"),
+    +0.50: (">:)", ":-)", ":)", "=)", "=]", ":]", ":}", ":>", ":3", "8)", "8-)"),
+    +0.25: (">;]", ";-)", ";)", ";-]", ";]", ";D", ";^)", "*-)", "*)"),
+    +0.05: (">:o", ":-O", ":O", ":o", ":-o", "o_O", "o.O", "°O°", "°o°"),
+    -0.25: (">:/", ":-/", ":/", ":\\", ">:\\", ":-.", ":-s", ":s", ":S", ":-S", ">.>"),
+    -0.75: (">:[", ":-(", ":(", "=(", ":-[", ":[", ":{", ":-<", ":c", ":-c", "=/"),
+    -1.00: (":'(", ":'''(", ";'("),
+}
+_EMOTICON_POLARITY = {}
+for _p, _faces in EMOTICONS.items():
+    for _face in _faces:
+        _EMOTICON_POLARITY.setdefault(_face.lower(), _p)
+_EMOTICON = re.compile("(%s)($|\\s)" % "|".join(
+    r" ?".join(re.escape(c) for c in face) for faces in EMOTICONS.values() for face in faces))
+
+
+def tokenize(text):
+    """Lowercase tokens with punctuation, quotes and contractions split off."""
+    for a, b in _CONTRACTIONS:
+        text = text.replace(a, b)
+    tokens = []
+    for t in text.translate(_QUOTES).split():
+        tail = []
+        while t.startswith(_LEADING):
+            tokens.append(t[0])
+            t = t[1:]
+        while t.endswith(_TRAILING):
+            if t.endswith(_LEADING):
+                tail.append(t[-1])
+                t = t[:-1]
+            if t.endswith("..."):
+                tail.append("...")
+                t = t[:-3].rstrip(".")
+            if t.endswith("."):
+                if _ABBREVIATION.match(t):
+                    break
+                tail.append(".")
+                t = t[:-1]
+        if t:
+            tokens.append(t)
+        tokens.extend(reversed(tail))
+    joined = _SARCASM.sub("(!)", " ".join(tokens))
+    joined = _EMOTICON.sub(lambda m: m.group(1).replace(" ", "") + m.group(2), joined)
+    return joined.lower().split()
+
+
+class LexiconEngine:
+    """Polarity in [-1, 1] from a word -> (polarity, intensity) table."""
+
+    def __init__(self, path=LEXICON_FILE):
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        self.words = {w: tuple(v) for w, v in data["words"].items()}
+        self.modifiers = frozenset(data["modifiers"])
+
+    def polarity(self, text):
+        words, modifiers = self.words, self.modifiers
+        scored = []  # [polarity, intensity, negated] per assessed word
+        modifier = negation = None
+        for w in tokenize(text):
+            known = words.get(w)
+            if known is not None:
+                p, i = known
+                if modifier is None:
+                    scored.append([p, i, False])
+                else:
+                    # "very good": the adverb's entry takes the next word, scaled.
+                    last = scored[-1]
+                    last[0] = max(-1.0, min(p * last[1], 1.0))
+                    last[1] = i
+                if negation is not None:
+                    scored[-1][1] = 1.0 / scored[-1][1]
+                    scored[-1][2] = True
+                modifier = w if w in modifiers else None
+                negation = w if w in NEGATIONS else None
+                continue
+
+            if w in NEGATIONS:
+                negation = w
+            elif negation and len(w.strip("'")) > 1:
+                negation = None  # kept across small words: "not a good day"
+            if negation is not None and modifier is not None and modifier.endswith("ly"):
+                scored[-1][2] = True  # "really not good"
+                negation = None
+            elif modifier and len(w) > 2:
+                modifier = None
+            if w == "!" and scored:
+                scored[-1][0] = max(-1.0, min(scored[-1][0] * 1.25, 1.0))
+            if w == "(!)":
+                scored.append([0.0, 1.0, False])  # sarcasm
+            if not w.isalpha() and len(w) <= 5 and w not in _PUNCTUATION:
+                face = _EMOTICON_POLARITY.get(w)
+                if face is not None:
+                    scored.append([face, 1.0, False])
+
+        if not scored:
+            return 0.0
+        # "not good" is slightly bad, "not bad" slightly good.
+        return sum(p * -0.5 if negated else p for p, _, negated in scored) / len(scored)
+
+
+def compile_lexicon(path=LEXICON_FILE):
+    # Flatten TextBlob's sentiment lexicon (averaged over senses and parts of
+    # speech, plus its derived "-ly" adverbs) into the JSON table above.
+    from textblob.en import sentiment as pattern
+    entries = dict(pattern.items())
+    words = {w: [pos[None][0], pos[None][2]] for w, pos in sorted(entries.items())}  # polarity, intensity
+    modifiers = sorted(w for w, pos in entries.items() if "RB" in pos)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"source": "textblob en-sentiment.xml", "words": words, "modifiers": modifiers},
+                  f, ensure_ascii=False, separators=(",", ":"))
+        f.write("\n")
+    return len(words)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Built-in lexicon sentiment engine tools.")
+    parser.add_argument('command', choices=['compile'])
+    parser.add_argument('--path', default=LEXICON_FILE)
+    args = parser.parse_args(argv)
+    print(f"Compiled {compile_lexicon(args.path)} words into {args.path}")
+
+
+if __name__ == "__main__":
+    main()
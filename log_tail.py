@@ -0,0 +1,39 @@
+# Helpers for tail-reading append-only CSV logs such as mood_data.csv.
+#
+# Readers remember how many bytes they have consumed and parse only what was
+# appended since. They must stop at whole records -- a newline inside a
+# quoted field does not end a record -- and notice when the file they were
+# reading was replaced, which a hash of its first bytes (plus the inode)
+# detects cheaply.
+
+import hashlib
+
+HEAD_BYTES = 4096
+
+
+def head_hash(path, limit):
+    """SHA-256 of the first ``min(limit, HEAD_BYTES)`` bytes of ``path``."""
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read(min(limit, HEAD_BYTES))).hexdigest()
+
+
+def complete_records(tail):
+    """``tail`` up to the end of its last whole record."""
+    # A newline inside a quoted field (odd number of quotes before it) does not end a record.
+    end = tail.rfind(b"\n") + 1
+    while end and tail.count(b'"', 0, end) % 2:
+        end = tail.rfind(b"\n", 0, end - 1) + 1
+    return tail[:end]
+
+
+def split_records(chunk, base=0):
+    """(offset, bytes) of each whole record in ``chunk``, which starts at file offset ``base``."""
+    records = []
+    start = pos = quotes = 0
+    for line in chunk.split(b"\n")[:-1]:
+        pos += len(line) + 1
+        quotes += line.count(b'"')
+        if quotes % 2 == 0:
+            records.append((base + start, chunk[start:pos]))
+            start, quotes = pos, 0
+    return records
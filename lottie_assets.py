@@ -0,0 +1,134 @@
+# Lottie animations for the mood page, without network calls on the rerun path.
+#
+# Lookups go memory (an LRU shared by all sessions) -> downloaded copy in
+# lottie_cache/ -> bundled copy in lottie/. When the copy found is missing or
+# older than ``max_age`` a refresh is queued on a small thread pool, which
+# downloads with a timeout and swaps the file in atomically. The page never
+# waits on lottiefiles.com and keeps working offline.
+#
+#   python lottie_assets.py refresh    # download every animation now
+
+import argparse
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, wait
+
+import requests
+
+LOTTIE_URLS = {
+    "Happy": "https://assets4.lottiefiles.com/packages/lf20_4kx2q32n.json",
+    "Sad": "https://assets9.lottiefiles.com/packages/lf20_jcikwtux.json",
+    "Neutral": "https://assets3.lottiefiles.com/packages/lf20_3u5u5p1k.json",
+}
+BUNDLED_DIR = "lottie"
+CACHE_DIR = "lottie_cache"
+
+
+class LottieCache:
+    """Thread-safe LRU of Lottie JSON backed by disk and refreshed in the background."""
+
+    def __init__(self, urls=LOTTIE_URLS, cache_dir=CACHE_DIR, bundled_dir=BUNDLED_DIR,
+                 max_entries=8, timeout=5.0, max_age=7 * 24 * 3600, retry_after=300, workers=3):
+        self.urls = dict(urls)
+        self.cache_dir = cache_dir
+        self.bundled_dir = bundled_dir
+        self.max_entries = max_entries
+        self.timeout = timeout
+        self.max_age = max_age
+        self.retry_after = retry_after
+        self._memory = OrderedDict()  # name -> (data, refresh due at)
+        self._pending = {}
+        self._retry_at = {}
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="lottie")
+
+    def _path(self, directory, name):
+        return os.path.join(directory, name.lower() + ".json")
+
+    def _read(self, path):
+        try:
+            with open(path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _load(self, name):
+        # Downloaded copy first (due for refresh after max_age), then the bundled one (due now).
+        path = self._path(self.cache_dir, name)
+        data = self._read(path)
+        if data is not None:
+            return data, os.path.getmtime(path) + self.max_age
+        return self._read(self._path(self.bundled_dir, name)), 0.0
+
+    def _remember(self, name, entry):
+        with self._lock:
+            self._memory[name] = entry
+            self._memory.move_to_end(name)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+    def get(self, name):
+        """Animation JSON for ``name``, or None when no copy exists yet. Never blocks on the network."""
+        with self._lock:
+            entry = self._memory.get(name)
+            if entry is not None:
+                self._memory.move_to_end(name)
+        if entry is None:
+            entry = self._load(name)
+            if entry[0] is not None:
+                self._remember(name, entry)
+        if time.time() >= entry[1]:
+            self.refresh(name)
+        return entry[0]
+
+    # ------------------ Refreshing ------------------
+    def refresh(self, name):
+        # Queue a download unless one is running or the last one failed recently.
+        with self._lock:
+            if name not in self.urls or name in self._pending or time.time() < self._retry_at.get(name, 0):
+                return self._pending.get(name)
+            future = self._pending[name] = self._pool.submit(self._fetch, name)
+            return future
+
+    def _fetch(self, name):
+        try:
+            response = requests.get(self.urls[name], timeout=self.timeout)
+            response.raise_for_status()
+            data = response.json()
+            if not isinstance(data, dict) or "layers" not in data:
+                raise ValueError("not a Lottie animation")
+            os.makedirs(self.cache_dir, exist_ok=True)
+            path = self._path(self.cache_dir, name)
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+            os.replace(tmp_path, path)
+            self._remember(name, (data, time.time() + self.max_age))
+            return True
+        except (requests.RequestException, ValueError, OSError):
+            with self._lock:
+                self._retry_at[name] = time.time() + self.retry_after
+            return False
+        finally:
+            with self._lock:
+                self._pending.pop(name, None)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Manage the cached Lottie animations.")
+    parser.add_argument('command', choices=['refresh'])
+    parser.add_argument('--timeout', type=float, default=10.0)
+    args = parser.parse_args(argv)
+
+    cache = LottieCache(timeout=args.timeout)
+    futures = {name: cache.refresh(name) for name in cache.urls}
+    wait(futures.values())
+    for name, future in futures.items():
+        print(f"{name:<8} {'updated' if future.result() else 'failed, keeping the existing copy'}")
+
+
+if __name__ == "__main__":
+    main()
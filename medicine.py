@@ -1,11 +1,90 @@
 import os
-import json
+import queue
+import time
 from datetime import datetime, timedelta
 import streamlit as st
 import pandas as pd 
-import cv2
 import numpy as np
-from PIL import Image
+
+from medicine_store import SQLiteMedicineStore, MEDICINE_DB, MEDICINE_FILE
+from interactions import InteractionIndex, INTERACTIONS_FILE
+from name_search import TrigramIndex
+from qr_ingest import ingest
+from qr_scanner import CameraScanner
+
+SAMPLE_DATA = [
+    {"Medicine Name": "Amoxicillin", "Expiry Date": "2025-12-31", "Dosage": "5ml twice daily", "Purpose": "Antibiotic", "Doctor": "Dr. Smith"},
+    {"Medicine Name": "Ibuprofen", "Expiry Date": "2024-10-15", "Dosage": "100mg after meal", "Purpose": "Pain relief", "Doctor": "Dr. Meena"},
+    {"Medicine Name": "Cough Syrup", "Expiry Date": "2025-03-01", "Dosage": "10ml at bedtime", "Purpose": "Cough treatment", "Doctor": "Dr. Arjun"},
+    {"Medicine Name": "Vitamin D", "Expiry Date": "2025-06-20", "Dosage": "1 tab daily", "Purpose": "Supplement", "Doctor": "Dr. Kavya"},
+    {"Medicine Name": "Paracetamol", "Expiry Date": "2024-09-30", "Dosage": "250mg twice a day", "Purpose": "Fever", "Doctor": "Dr. Ramesh"},
+    {"Medicine Name": "Cetirizine", "Expiry Date": "2025-01-10", "Dosage": "5ml once daily", "Purpose": "Allergy", "Doctor": "Dr. Nisha"}
+]
+
+PAGE_SIZE = 50
+EXPIRY_WARNING_DAYS = 30
+PREVIEW_INTERVAL = 0.2  # seconds between camera preview updates
+NAME_RESULTS = 20  # options shown in the name pickers
+
+@st.cache_resource
+def get_store():
+    # One SQLite store per server process, seeded once from the CSV inventory.
+    store = SQLiteMedicineStore(MEDICINE_DB)
+    store.import_csv(MEDICINE_FILE)
+    return store
+
+EXPIRY_STATUSES = np.array(["🔴 Expired", "🟡 Expiring soon", "🟢 OK", "⚪ Unknown"])
+
+def expiry_status(expiry_dates, today, days=EXPIRY_WARNING_DAYS):
+    # Vectorized replacement for the per-row strptime in the old Styler callback.
+    exp = pd.to_datetime(pd.Series(expiry_dates), format="%Y-%m-%d", errors="coerce")
+    today = pd.Timestamp(today)
+    code = np.select(
+        [exp.isna(), exp < today, exp <= today + timedelta(days=days)],
+        [3, 0, 1],
+        default=2,
+    )
+    return EXPIRY_STATUSES[code]
+
+@st.cache_resource(max_entries=1)
+def get_interaction_index(mtime):
+    # Rebuilt only when drug_interactions.csv changes (mtime is the cache key); the old one is evicted.
+    return InteractionIndex.load(INTERACTIONS_FILE)
+
+def interaction_index():
+    mtime = os.path.getmtime(INTERACTIONS_FILE) if os.path.exists(INTERACTIONS_FILE) else None
+    return get_interaction_index(mtime)
+
+def format_interactions(found):
+    return [f"{a} may interact with {b}" + (f" — {desc}" if desc else "") for a, b, desc in found]
+
+# Cached reads shared by all sessions. ``version`` comes from the store and is
+# bumped by every add/delete, so entries go stale exactly when data changes.
+@st.cache_data(max_entries=32)
+def load_page(version, offset, limit, today):
+    df = get_store().page(offset, limit)
+    df.insert(0, "Status", expiry_status(df["Expiry Date"], today))
+    return df
+
+@st.cache_data(max_entries=4)
+def load_names(version):
+    return get_store().names()
+
+@st.cache_resource
+def get_name_index():
+    return TrigramIndex()
+
+def name_index(version):
+    # One search index for all sessions, synced only when the store changes.
+    index = get_name_index()
+    if index.version != version:
+        index.sync(load_names(version), version)
+    return index
+
+@st.cache_data(max_entries=4)
+def load_expiry_summary(version, today, days):
+    store = get_store()
+    return store.count(), store.expiry_counts(today, days), store.expiring_within(today, days, limit=PAGE_SIZE)
 
 def show():
     st.markdown("""
@@ -21,57 +100,37 @@ def show():
         if st.button("⬅️ Back"):
             st.session_state.page = "dashboard"
 
-    MEDICINE_FILE = "medicine_data.csv"
+    store = get_store()
     today = datetime.now().date()
 
-    @st.cache_data
     def load_data():
-        if os.path.exists(MEDICINE_FILE):
-            df = pd.read_csv(MEDICINE_FILE)
-            if not df.empty:
-                return df
-        sample_data = pd.DataFrame([
-            {"Medicine Name": "Amoxicillin", "Expiry Date": "2025-12-31", "Dosage": "5ml twice daily", "Purpose": "Antibiotic", "Doctor": "Dr. Smith"},
-            {"Medicine Name": "Ibuprofen", "Expiry Date": "2024-10-15", "Dosage": "100mg after meal", "Purpose": "Pain relief", "Doctor": "Dr. Meena"},
-            {"Medicine Name": "Cough Syrup", "Expiry Date": "2025-03-01", "Dosage": "10ml at bedtime", "Purpose": "Cough treatment", "Doctor": "Dr. Arjun"},
-            {"Medicine Name": "Vitamin D", "Expiry Date": "2025-06-20", "Dosage": "1 tab daily", "Purpose": "Supplement", "Doctor": "Dr. Kavya"},
-            {"Medicine Name": "Paracetamol", "Expiry Date": "2024-09-30", "Dosage": "250mg twice a day", "Purpose": "Fever", "Doctor": "Dr. Ramesh"},
-            {"Medicine Name": "Cetirizine", "Expiry Date": "2025-01-10", "Dosage": "5ml once daily", "Purpose": "Allergy", "Doctor": "Dr. Nisha"}
-        ])
-        sample_data.to_csv(MEDICINE_FILE, index=False)
-        return sample_data
-
-    df = load_data()
-
-    def decode_qr_data(image):
-        detector = cv2.QRCodeDetector()
-        if isinstance(image, Image.Image):
-            image = np.array(image.convert("RGB"))
-        elif isinstance(image, np.ndarray):
-            pass
-        else:
-            st.error("Unsupported image format.")
-            return None
+        if store.count() == 0:
+            store.add(SAMPLE_DATA)
 
-        data, bbox, _ = detector.detectAndDecode(image)
-        if data:
-            try:
-                return json.loads(data)
-            except Exception as e:
-                st.error(f"❌ Invalid QR code format: {e}")
-        return None
+    load_data()
 
     st.subheader("📷 Upload or Scan QR Code")
-    uploaded_img = st.file_uploader("Upload QR Code (PNG/JPG)", type=["png", "jpg", "jpeg"])
+    uploads = st.file_uploader("Upload QR Codes (PNG/JPG, or a ZIP of photos)",
+                               type=["png", "jpg", "jpeg", "zip"], accept_multiple_files=True)
 
-    if uploaded_img:
-        image = Image.open(uploaded_img)
-        qr_data = decode_qr_data(image)
+    # The uploader keeps its files across reruns; ingest each upload only once.
+    if 'ingested_uploads' not in st.session_state:
+        st.session_state.ingested_uploads = set()
+    new_uploads = [f for f in uploads or [] if f.file_id not in st.session_state.ingested_uploads]
+    if new_uploads:
+        with st.spinner(f"Decoding {len(new_uploads)} upload(s)..."):
+            st.session_state.ingest_report = ingest([(f.name, f.getvalue()) for f in new_uploads], store)
+        st.session_state.ingested_uploads.update(f.file_id for f in new_uploads)
 
-        if qr_data:
-            df = pd.concat([df, pd.DataFrame([qr_data])], ignore_index=True)
-            df.to_csv(MEDICINE_FILE, index=False)
-            st.success(f"✅ {qr_data.get('Medicine Name', 'Medicine')} added from uploaded QR!")
+    report = st.session_state.get('ingest_report')
+    if uploads and report is not None:
+        added = int((report["Status"] == "added").sum())
+        if added:
+            st.success(f"✅ {added} medicine(s) added from {len(report)} uploaded image(s)!")
+        if added < len(report):
+            st.warning(f"⚠️ {len(report) - added} image(s) were not added.")
+        with st.expander("📋 Upload report", expanded=added < len(report)):
+            st.dataframe(report, use_container_width=True, hide_index=True)
 
     use_camera = st.checkbox("📸 Use Camera to Scan QR")
 
@@ -81,33 +140,39 @@ def show():
     if use_camera:
         st.info("Camera will auto-close after one scan.")
         stframe = st.empty()
-        cam = cv2.VideoCapture(0)
-        scanned = False
-
-        while cam.isOpened():
-            ret, frame = cam.read()
-            if not ret:
-                break
-
-            stframe.image(frame, channels="BGR", use_container_width=True)
-            qr_data = decode_qr_data(frame)
-            if qr_data and qr_data not in st.session_state.scanned_qrs:
-                df = pd.concat([df, pd.DataFrame([qr_data])], ignore_index=True)
-                df.to_csv(MEDICINE_FILE, index=False)
-                st.session_state.scanned_qrs.append(qr_data)
-                st.success(f"✅ {qr_data.get('Medicine Name', 'Medicine')} scanned and added!")
-                st.snow()
-                cam.release()
-                stframe.empty()
-
-                scanned = True
-                break
-
-        if not scanned:
-            cam.release()
-            
-    df = load_data()
+        errors = set()
 
+        # Capture and decoding run on their own threads; this loop only
+        # polls for results and refreshes the preview a few times a second.
+        with CameraScanner(0) as scanner:
+            last_preview = 0.0
+            while not scanner.done() or not scanner.results.empty():
+                try:
+                    qr_data = scanner.results.get(timeout=PREVIEW_INTERVAL)
+                except queue.Empty:
+                    qr_data = None
+
+                now = time.perf_counter()
+                frame = scanner.latest_frame()
+                if frame is not None and now - last_preview >= PREVIEW_INTERVAL:
+                    stframe.image(frame, channels="BGR", use_container_width=True)
+                    last_preview = now
+
+                if isinstance(qr_data, ValueError):
+                    if str(qr_data) not in errors:
+                        errors.add(str(qr_data))
+                        st.error(f"❌ {qr_data}")
+                elif qr_data and qr_data not in st.session_state.scanned_qrs:
+                    store.add([qr_data])
+                    st.session_state.scanned_qrs.append(qr_data)
+                    st.success(f"✅ {qr_data.get('Medicine Name', 'Medicine')} scanned and added!")
+                    st.snow()
+                    break
+            metrics = scanner.metrics()
+        stframe.empty()
+        st.caption(f"📈 {metrics['capture_fps']:.0f} fps captured · {metrics['decode_fps']:.0f} fps decoded · "
+                   f"decode {metrics['decode_ms_p50']:.0f} ms (p99 {metrics['decode_ms_p99']:.0f} ms)")
+            
     st.sidebar.header("➕ Add New Medicine")
     with st.sidebar.form("add_medicine"):
         name = st.text_input("Medicine Name")
@@ -117,61 +182,75 @@ def show():
         doctor = st.text_input("Prescribed By")
         submit = st.form_submit_button("Add")
         if submit and name:
-            new_row = pd.DataFrame([{
+            store.add([{
                 "Medicine Name": name,
                 "Expiry Date": expiry.strftime('%Y-%m-%d'),
                 "Dosage": dose,
                 "Purpose": purpose,
                 "Doctor": doctor
             }])
-            df = pd.concat([df, new_row], ignore_index=True)
-            df.to_csv(MEDICINE_FILE, index=False)
             st.sidebar.success(f"✅ {name} added!")
 
     st.sidebar.header("🗑️ Delete Medicine")
-    if not df.empty:
-        del_name = st.sidebar.selectbox("Select to Delete", df["Medicine Name"].unique())
-        if st.sidebar.button("Delete"):
-            df = df[df["Medicine Name"] != del_name]
-            df.to_csv(MEDICINE_FILE, index=False)
-            st.sidebar.success(f"✅ {del_name} deleted!")
+    if len(name_index(store.version())):
+        query = st.sidebar.text_input("Search medicine to delete", key="delete_query")
+        matches = name_index(store.version()).search(query, NAME_RESULTS)
+        if matches:
+            del_name = st.sidebar.selectbox("Select to Delete", matches)
+            if st.sidebar.button("Delete"):
+                store.delete(del_name)
+                st.sidebar.success(f"✅ {del_name} deleted!")
+        else:
+            st.sidebar.caption("No matching medicines.")
 
     st.subheader("📦 Medicine Inventory")
-    def highlight_expiry(row):
-        try:
-            exp = datetime.strptime(row["Expiry Date"], "%Y-%m-%d").date()
-            if exp < today:
-                return ['background-color: #f8d7da; color: #721c24'] * len(row)
-            elif exp <= today + timedelta(days=30):
-                return ['background-color: #fff3cd'] * len(row)
-        except:
-            return [''] * len(row)
-        return [''] * len(row)
-
-    if not df.empty:
-        st.dataframe(df.style.apply(highlight_expiry, axis=1), use_container_width=True)
+    version = store.version()
+    total, (expired, expiring), expiring_soon = load_expiry_summary(version, today, EXPIRY_WARNING_DAYS)
+    if total:
+        col1, col2, col3 = st.columns(3)
+        col1.metric("Medicines", total)
+        col2.metric("Expired", expired)
+        col3.metric(f"Expiring in {EXPIRY_WARNING_DAYS} days", expiring)
+        if expiring:
+            with st.expander("⏰ Expiring soon"):
+                st.dataframe(expiring_soon, use_container_width=True)
+
+        pages = (total - 1) // PAGE_SIZE + 1
+        page = st.number_input("Page", min_value=1, max_value=pages, value=1) if pages > 1 else 1
+        df = load_page(version, (page - 1) * PAGE_SIZE, PAGE_SIZE, today)
+        st.dataframe(
+            df,
+            use_container_width=True,
+            hide_index=True,
+            column_config={
+                "Status": st.column_config.TextColumn("Status", help=f"Expired, or expiring within {EXPIRY_WARNING_DAYS} days"),
+            },
+        )
+        st.caption(f"Page {page} of {pages}")
     else:
         st.info("No medicines found. Use the sidebar to add or scan.")
 
     st.subheader("⚠️ Check for Drug Interactions")
-    interactions = {
-        "Amoxicillin": ["Warfarin"],
-        "Ciprofloxacin": ["Antacids"],
-        "Ibuprofen": ["Aspirin"],
-        "Paracetamol": [],
-    }
-
-    selected = st.multiselect("Select Medicines to Check", df["Medicine Name"].unique())
+    interactions = interaction_index()
+
+    query = st.text_input("Search medicines", key="interaction_query")
+    # Keep earlier picks selectable while the search shows other matches.
+    picked = st.session_state.get("interaction_selection", [])
+    options = list(dict.fromkeys(picked + name_index(store.version()).search(query, NAME_RESULTS)))
+    selected = st.multiselect("Select Medicines to Check", options, key="interaction_selection")
     if selected:
-        warnings = []
-        for med in selected:
-            for check in selected:
-                if check in interactions.get(med, []) and med != check:
-                    warnings.append(f"{med} may interact with {check}")
+        warnings = format_interactions(interactions.check(selected))
         if warnings:
             st.warning("🚨 Interactions Found:\n" + "\n".join(warnings))
         else:
             st.success("✅ No known interactions.")
 
-    with open(MEDICINE_FILE, "rb") as f:
-        st.download_button("Download Medicine Data", f, file_name="medicine_data.csv")
+    if st.button("🔎 Check Entire Inventory"):
+        warnings = format_interactions(interactions.check(load_names(store.version())))
+        if warnings:
+            st.warning(f"🚨 {len(warnings)} interaction(s) in inventory:\n" + "\n".join(warnings[:100]))
+        else:
+            st.success("✅ No known interactions in the inventory.")
+
+    # Built only when clicked, so large inventories don't slow every rerun.
+    st.download_button("Download Medicine Data", lambda: store.frame().to_csv(index=False), file_name="medicine_data.csv")
@@ -0,0 +1,175 @@
+# Storage for the medicine inventory.
+#
+# The app keeps the inventory in SQLite (SQLiteMedicineStore, medicine_data.db)
+# with indexes on expiry date and name, and a version counter bumped by every
+# write so cached reads know when to refresh. An existing medicine_data.csv is
+# copied in once by import_csv.
+
+import os
+import re
+from datetime import timedelta
+
+import pandas as pd
+
+from sqlite_local import LocalConnection
+
+MEDICINE_FILE = "medicine_data.csv"
+COLUMNS = ["Medicine Name", "Expiry Date", "Dosage", "Purpose", "Doctor"]
+
+
+def normalize_row(row):
+    # Keep only the inventory columns, as strings, in a stable order.
+    return {col: "" if row.get(col) is None else str(row.get(col)) for col in COLUMNS}
+
+
+def validate_row(row):
+    """Check a decoded payload against the inventory schema and normalize it.
+
+    Raises ValueError describing the first problem found. Unknown keys are
+    ignored, like everywhere else rows enter the store.
+    """
+    if not isinstance(row, dict):
+        raise ValueError("payload is not a JSON object")
+    bad = [col for col in COLUMNS if isinstance(row.get(col), (dict, list))]
+    if bad:
+        raise ValueError(f"nested value for {', '.join(bad)}")
+    row = normalize_row(row)
+    if not row["Medicine Name"].strip():
+        raise ValueError("missing Medicine Name")
+    if row["Expiry Date"]:
+        try:
+            pd.Timestamp(row["Expiry Date"])
+        except (ValueError, TypeError):
+            raise ValueError(f"unparseable Expiry Date {row['Expiry Date']!r}") from None
+    return row
+
+
+# ------------------ SQLite Backend ------------------
+MEDICINE_DB = "medicine_data.db"
+_DB_COLUMNS = ["name", "expiry_date", "dosage", "purpose", "doctor"]
+_ISO_DATE = "[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9]"
+_ISO_DATE_RE = re.compile(r"\d{4}-\d{2}-\d{2}")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS medicines (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    expiry_date TEXT NOT NULL DEFAULT '',
+    dosage TEXT NOT NULL DEFAULT '',
+    purpose TEXT NOT NULL DEFAULT '',
+    doctor TEXT NOT NULL DEFAULT ''
+);
+CREATE INDEX IF NOT EXISTS idx_medicines_expiry ON medicines (expiry_date);
+CREATE INDEX IF NOT EXISTS idx_medicines_name ON medicines (name);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+INSERT OR IGNORE INTO meta (key, value) VALUES ('version', 0);
+"""
+
+
+def _iso_date(value):
+    # Store parseable expiry dates as YYYY-MM-DD so string order is date order.
+    if _ISO_DATE_RE.fullmatch(value):
+        return value
+    try:
+        return pd.Timestamp(value).strftime("%Y-%m-%d") if value else ""
+    except (ValueError, TypeError):
+        return str(value)
+
+
+class SQLiteMedicineStore:
+    """Medicine inventory in SQLite (WAL) with expiry-date and name indexes."""
+
+    def __init__(self, path=MEDICINE_DB):
+        self.path = path
+        self._db = LocalConnection(path)
+        with self._db.connect() as conn:
+            conn.executescript(_SCHEMA)
+
+    def _query(self, sql, params=()):
+        rows = self._db.connect().execute(sql, params).fetchall()
+        return pd.DataFrame(rows, columns=["id"] + COLUMNS).drop(columns="id")
+
+    # ------------------ Reading ------------------
+    def frame(self):
+        return self._query("SELECT * FROM medicines ORDER BY id")
+
+    def version(self):
+        # Bumped in the same transaction as every change, by any process.
+        return int(self._db.connect().execute("SELECT value FROM meta WHERE key = 'version'").fetchone()[0])
+
+    def count(self):
+        return self._db.connect().execute("SELECT COUNT(*) FROM medicines").fetchone()[0]
+
+    def page(self, offset=0, limit=50):
+        return self._query("SELECT * FROM medicines ORDER BY id LIMIT ? OFFSET ?", (limit, offset))
+
+    def names(self):
+        rows = self._db.connect().execute("SELECT DISTINCT name FROM medicines ORDER BY name").fetchall()
+        return [r[0] for r in rows]
+
+    def expired(self, today, limit=None):
+        return self._query(
+            f"SELECT * FROM medicines WHERE expiry_date GLOB '{_ISO_DATE}' AND expiry_date < ? "
+            "ORDER BY expiry_date LIMIT ?",
+            (today.strftime("%Y-%m-%d"), -1 if limit is None else limit),
+        )
+
+    def expiring_within(self, today, days, limit=None):
+        end = today + timedelta(days=days)
+        return self._query(
+            f"SELECT * FROM medicines WHERE expiry_date GLOB '{_ISO_DATE}' AND expiry_date BETWEEN ? AND ? "
+            "ORDER BY expiry_date LIMIT ?",
+            (today.strftime("%Y-%m-%d"), end.strftime("%Y-%m-%d"), -1 if limit is None else limit),
+        )
+
+    def expiry_counts(self, today, days):
+        # (expired, expiring within ``days``) counted on the expiry index.
+        today_s = today.strftime("%Y-%m-%d")
+        end_s = (today + timedelta(days=days)).strftime("%Y-%m-%d")
+        conn = self._db.connect()
+        where = f"expiry_date GLOB '{_ISO_DATE}' AND "
+        expired = conn.execute(f"SELECT COUNT(*) FROM medicines WHERE {where} expiry_date < ?", (today_s,)).fetchone()[0]
+        expiring = conn.execute(
+            f"SELECT COUNT(*) FROM medicines WHERE {where} expiry_date BETWEEN ? AND ?", (today_s, end_s)
+        ).fetchone()[0]
+        return expired, expiring
+
+    # ------------------ Writing ------------------
+    def _insert(self, conn, rows):
+        records = []
+        for row in map(normalize_row, rows):
+            row["Expiry Date"] = _iso_date(row["Expiry Date"])
+            records.append(tuple(row[c] for c in COLUMNS))
+        conn.executemany(f"INSERT INTO medicines ({', '.join(_DB_COLUMNS)}) VALUES (?, ?, ?, ?, ?)", records)
+        if records:
+            self._bump_version(conn)
+
+    def _bump_version(self, conn):
+        conn.execute("UPDATE meta SET value = CAST(value AS INTEGER) + 1 WHERE key = 'version'")
+
+    def add(self, rows):
+        with self._db.connect() as conn:
+            self._insert(conn, rows)
+
+    def delete(self, name):
+        with self._db.connect() as conn:
+            if conn.execute("DELETE FROM medicines WHERE name = ?", (name,)).rowcount:
+                self._bump_version(conn)
+
+    # ------------------ Import ------------------
+    def import_csv(self, csv_path=MEDICINE_FILE):
+        # One-time copy of the CSV inventory (rows that fail validate_row are skipped); later calls are no-ops.
+        with self._db.connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            if conn.execute("SELECT 1 FROM meta WHERE key = 'imported_from'").fetchone():
+                return 0
+            rows = []
+            if os.path.exists(csv_path):
+                for row in pd.read_csv(csv_path, dtype=str, keep_default_na=False).to_dict("records"):
+                    try:
+                        rows.append(validate_row(row))
+                    except ValueError:
+                        continue
+            self._insert(conn, rows)
+            conn.execute("INSERT INTO meta (key, value) VALUES ('imported_from', ?)", (csv_path,))
+        return len(rows)
@@ -0,0 +1,181 @@
+# On-disk registry for the growth RandomForest.
+#
+# The model is trained once (``python model_registry.py train``) and saved with
+# its MAE and a fingerprint of the training data + hyperparameters. The growth
+# page loads the saved artifact and only retrains when the fingerprint changes.
+# A model published by ``model_sweep.py`` records the data it was fitted on:
+# it is served only for that same data (and params/sklearn version). For any
+# other data a model is fitted in memory and the published artifact is kept.
+
+import argparse
+import hashlib
+import json
+import os
+import tempfile
+import time
+from datetime import datetime
+
+import joblib
+import pandas as pd
+import sklearn
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.metrics import mean_absolute_error
+from sklearn.model_selection import train_test_split
+
+MODEL_DIR = "models"
+MODEL_NAME = "growth_model"
+FEATURES = ['age', 'height', 'weight', 'BMI']
+TARGET = 'height'
+DEFAULT_PARAMS = {"n_estimators": 200, "max_depth": 12, "random_state": 42}
+
+
+def _paths(name=MODEL_NAME, model_dir=MODEL_DIR):
+    base = os.path.join(model_dir, name)
+    return base + ".joblib", base + ".json"
+
+
+# ------------------ Training ------------------
+def fit_model(data, params=None):
+    # Fit on 80% of the rows; the MAE is measured on the other 20%.
+    params = {**DEFAULT_PARAMS, **(params or {})}
+    X = data[FEATURES]
+    y = data[TARGET]
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+    model = RandomForestRegressor(**params)
+    model.fit(X_train, y_train)
+    y_pred = model.predict(X_test)
+    mae = mean_absolute_error(y_test, y_pred)
+    return model, mae
+
+
+def _hash_rows(digest, data):
+    digest.update(pd.util.hash_pandas_object(data[FEATURES + [TARGET]], index=False).to_numpy().tobytes())
+    return digest
+
+
+def data_fingerprint(data):
+    # Hash of the training rows alone.
+    return _hash_rows(hashlib.sha256(), data).hexdigest()
+
+
+def fingerprint(data, params=None):
+    # Hash of the training rows, hyperparameters and sklearn version.
+    params = {**DEFAULT_PARAMS, **(params or {})}
+    digest = _hash_rows(hashlib.sha256(), data)
+    digest.update(json.dumps(params, sort_keys=True).encode())
+    digest.update(sklearn.__version__.encode())
+    return digest.hexdigest()
+
+
+# ------------------ Persistence ------------------
+def _write_json(path, obj):
+    with open(path, "w") as f:
+        json.dump(obj, f, indent=2)
+
+
+def _replace(path, write):
+    # write(tmp) into a unique file next to ``path``, then rename it into place.
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path) or ".", suffix=".tmp")
+    os.close(fd)
+    try:
+        write(tmp)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def save_model(model, mae, fp, params=None, name=MODEL_NAME, model_dir=MODEL_DIR, published=False,
+               data_fp=None):
+    model_path, meta_path = _paths(name, model_dir)
+    os.makedirs(model_dir, exist_ok=True)
+    meta = {
+        "fingerprint": fp,
+        "mae": float(mae),
+        "params": {**DEFAULT_PARAMS, **(params or {})},
+        "sklearn_version": sklearn.__version__,
+        "trained_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "published": published,
+    }
+    if data_fp is not None:
+        meta["data_fingerprint"] = data_fp
+    # Uncompressed so the tree arrays can be memory-mapped on load. Each writer
+    # gets its own temp files, and the artifact carries the same fingerprint as
+    # the metadata, so a model and metadata from two different saves never pass
+    # as a match. Metadata is replaced last.
+    _replace(model_path, lambda tmp: joblib.dump({"fingerprint": fp, "model": model}, tmp))
+    _replace(meta_path, lambda tmp: _write_json(tmp, meta))
+    return meta
+
+
+def read_metadata(name=MODEL_NAME, model_dir=MODEL_DIR):
+    _, meta_path = _paths(name, model_dir)
+    try:
+        with open(meta_path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def load_model(name=MODEL_NAME, model_dir=MODEL_DIR, fp=None):
+    # Raises ValueError when the artifact was not saved with fingerprint ``fp``.
+    model_path, _ = _paths(name, model_dir)
+    try:
+        artifact = joblib.load(model_path, mmap_mode='r')
+    except ValueError:
+        artifact = joblib.load(model_path)
+    if not isinstance(artifact, dict) or (fp is not None and artifact.get("fingerprint") != fp):
+        raise ValueError(f"{model_path} does not match its metadata")
+    return artifact["model"]
+
+
+def train_and_save(data, params=None, name=MODEL_NAME, model_dir=MODEL_DIR):
+    model, mae = fit_model(data, params)
+    save_model(model, mae, fingerprint(data, params), params, name, model_dir)
+    return model, mae
+
+
+def _reusable(meta, data, params):
+    if meta.get("published"):
+        return (meta.get("data_fingerprint") == data_fingerprint(data)
+                and meta.get("params") == {**DEFAULT_PARAMS, **(params or {})}
+                and meta.get("sklearn_version") == sklearn.__version__)
+    return meta.get("fingerprint") == fingerprint(data, params)
+
+
+def load_or_train(data, params=None, name=MODEL_NAME, model_dir=MODEL_DIR):
+    # Saved model if it is still valid for this data/params, otherwise retrain.
+    # Without explicit params the published ones (e.g. from a sweep) are kept.
+    meta = read_metadata(name, model_dir)
+    if params is None and meta is not None:
+        params = meta.get("params")
+    if meta is not None and _reusable(meta, data, params):
+        try:
+            return load_model(name, model_dir, meta.get("fingerprint")), meta["mae"]
+        except (OSError, EOFError, ValueError):
+            pass
+    if meta is not None and meta.get("published"):
+        # Published for other data: fit for this data, keep the sweep result on disk.
+        return fit_model(data, params)
+    return train_and_save(data, params, name, model_dir)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Train or inspect the persisted growth model.")
+    parser.add_argument('command', choices=['train', 'info'])
+    parser.add_argument('--model-dir', default=MODEL_DIR)
+    args = parser.parse_args(argv)
+
+    if args.command == 'train':
+        import growth
+        saved = read_metadata(model_dir=args.model_dir)
+        params = saved.get("params") if saved else None  # keep swept params
+        start = time.perf_counter()
+        _, mae = train_and_save(growth.generate_synthetic_data(), params, model_dir=args.model_dir)
+        print(f"Trained in {time.perf_counter() - start:.2f}s, MAE {mae:.3f}")
+    meta = read_metadata(model_dir=args.model_dir)
+    print(json.dumps(meta, indent=2) if meta else "No saved model.")
+
+
+if __name__ == "__main__":
+    main()
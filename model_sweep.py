@@ -0,0 +1,138 @@
+# Cross-validated hyperparameter sweep for the growth RandomForest.
+#
+# Every (config, fold) pair is fitted in a process pool. The training matrix is
+# copied once into shared memory and each worker maps it instead of receiving
+# a pickled copy per task. The best config is refitted on all rows and
+# published through model_registry, where growth.main picks it up.
+#
+# Usage:
+#   python model_sweep.py                     # synthetic data used by the app
+#   python model_sweep.py --data clinic.csv   # any CSV/Parquet with age/height/weight/BMI
+#   python model_sweep.py --grid '{"n_estimators": [100, 300], "max_depth": [8, null]}'
+
+import argparse
+import itertools
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.metrics import mean_absolute_error
+from sklearn.model_selection import KFold
+
+import model_registry
+
+DEFAULT_GRID = {
+    "n_estimators": [100, 200],
+    "max_depth": [8, 12, None],
+    "min_samples_leaf": [1, 3],
+}
+N_SPLITS = 5
+
+_shared = {}
+
+
+# ------------------ Shared Training Matrix ------------------
+def _attach(name, shape):
+    # Pool initializer: map the parent's matrix (features..., target) read-only.
+    shm = shared_memory.SharedMemory(name=name)
+    matrix = np.ndarray(shape, dtype=np.float64, buffer=shm.buf)
+    matrix.flags.writeable = False
+    _shared.update(shm=shm, matrix=matrix)
+
+
+def _fit_fold(params, fold):
+    matrix = _shared["matrix"]
+    X, y = matrix[:, :-1], matrix[:, -1]
+    splits = KFold(N_SPLITS, shuffle=True, random_state=42).split(X)
+    train_idx, test_idx = next(itertools.islice(splits, fold, None))
+
+    start = time.perf_counter()
+    model = RandomForestRegressor(**{"random_state": 42, **params, "n_jobs": 1})
+    model.fit(X[train_idx], y[train_idx])
+    mae = mean_absolute_error(y[test_idx], model.predict(X[test_idx]))
+    return params, fold, mae, time.perf_counter() - start
+
+
+def expand_grid(grid):
+    keys = sorted(grid)
+    return [dict(zip(keys, values)) for values in itertools.product(*(grid[k] for k in keys))]
+
+
+def sweep(data, grid=None, workers=None):
+    # Returns one row per config: params, mean/std MAE across folds, fit seconds.
+    configs = expand_grid(grid or DEFAULT_GRID)
+    matrix = np.ascontiguousarray(data[model_registry.FEATURES + [model_registry.TARGET]].to_numpy(dtype=np.float64))
+
+    shm = shared_memory.SharedMemory(create=True, size=matrix.nbytes)
+    try:
+        np.ndarray(matrix.shape, dtype=np.float64, buffer=shm.buf)[:] = matrix
+        with ProcessPoolExecutor(max_workers=workers or os.cpu_count(),
+                                 initializer=_attach, initargs=(shm.name, matrix.shape)) as pool:
+            futures = [pool.submit(_fit_fold, params, fold) for params in configs for fold in range(N_SPLITS)]
+            results = [f.result() for f in futures]
+    finally:
+        shm.close()
+        shm.unlink()
+
+    rows = []
+    for i, params in enumerate(configs):
+        folds = results[i * N_SPLITS:(i + 1) * N_SPLITS]
+        maes = np.array([mae for _, _, mae, _ in folds])
+        rows.append({
+            "params": params,
+            "mae": maes.mean(),
+            "mae_std": maes.std(),
+            "fit_seconds": sum(seconds for _, _, _, seconds in folds),
+        })
+    return pd.DataFrame(rows).sort_values("mae", kind="stable").reset_index(drop=True)
+
+
+def publish_best(data, results):
+    # Refit the winner on every row; its cross-validated MAE is the one recorded.
+    params = {**model_registry.DEFAULT_PARAMS, **results.loc[0, "params"]}
+    model = RandomForestRegressor(**params)
+    model.fit(data[model_registry.FEATURES], data[model_registry.TARGET])
+    mae = float(results.loc[0, "mae"])
+    model_registry.save_model(model, mae, model_registry.fingerprint(data, params), params, published=True,
+                              data_fp=model_registry.data_fingerprint(data))
+    return params, mae
+
+
+def _load_data(path):
+    if path is None:
+        import growth
+        return growth.generate_synthetic_data()
+    if os.path.splitext(path)[1].lower() in ('.parquet', '.pq'):
+        return pd.read_parquet(path)
+    return pd.read_csv(path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Sweep RandomForest hyperparameters for the growth model.")
+    parser.add_argument('--data', help="CSV/Parquet training data (default: the app's synthetic data)")
+    parser.add_argument('--grid', type=json.loads, help="JSON object of parameter name -> list of values")
+    parser.add_argument('--workers', type=int, help="processes to use (default: all cores)")
+    parser.add_argument('--no-publish', action='store_true', help="report only, keep the saved model")
+    args = parser.parse_args(argv)
+
+    data = _load_data(args.data)
+    start = time.perf_counter()
+    results = sweep(data, args.grid, args.workers)
+    elapsed = time.perf_counter() - start
+
+    for row in results.itertuples():
+        print(f"MAE {row.mae:8.4f} ± {row.mae_std:.4f}   fit {row.fit_seconds:7.2f}s   {json.dumps(row.params)}")
+    print(f"{len(results)} configs x {N_SPLITS} folds in {elapsed:.2f}s wall")
+
+    if not args.no_publish:
+        params, mae = publish_best(data, results)
+        print(f"Published {json.dumps(params)} (cross-validated MAE {mae:.4f})")
+
+
+if __name__ == "__main__":
+    main()
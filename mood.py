@@ -1,14 +1,53 @@
 # Required installations (if not already installed):
-# pip install streamlit textblob plotly streamlit-lottie
+# pip install streamlit plotly streamlit-lottie
 
 import streamlit as st
 from streamlit_lottie import st_lottie
-from textblob import TextBlob
-import pandas as pd
+from concurrent import futures
 from datetime import datetime
-import requests
-import os
-import plotly.express as px
+
+from journal_search import JournalIndex
+from lottie_assets import LottieCache
+from mood_charts import CHART_WIDTH, behavior_figure, chart_budget, polarity_figure
+from mood_history import MoodHistory, MOOD_FILE
+from mood_writer import MoodWriter
+from sentiment import SentimentService
+
+@st.cache_resource
+def get_lottie_cache():
+    # One cache (and refresh pool) per server process, shared by all sessions.
+    return LottieCache()
+
+@st.cache_resource
+def get_sentiment_service():
+    return SentimentService()
+
+@st.cache_resource
+def get_mood_history():
+    # Shared tail reader; each rerun only parses entries appended since the last one.
+    return MoodHistory(MOOD_FILE)
+
+@st.cache_resource
+def get_journal_index():
+    # Persistent keyword index; each refresh only indexes entries saved since the last one.
+    return JournalIndex(MOOD_FILE)
+
+@st.cache_resource
+def get_mood_writer():
+    # One write-behind queue per server process; every session's entries go through it.
+    return MoodWriter(MOOD_FILE)
+
+@st.cache_data(max_entries=32)
+def load_trend_figures(version, start, end, width):
+    # One entry per (log version, visible range, chart width); ``version`` changes on every append.
+    max_points, max_bars = chart_budget(width)
+    line, bars, bucket_days = get_mood_history().trend(start, end, max_points, max_bars)
+    return polarity_figure(line), behavior_figure(bars, bucket_days)
+
+def analyze_mood(text):
+    # Polarity comes from the shared on-disk cache; the sentiment backend runs only for new text.
+    moods, polarity = get_sentiment_service().analyze([text])
+    return str(moods[0]), float(polarity[0])
 
 def show():
     
@@ -26,17 +65,6 @@ def show():
     with col1:
         if st.button("⬅️ Back"):
             st.session_state.page = "dashboard"
-    # Load Lottie animations
-    def load_lottieurl(url):
-        r = requests.get(url)
-        if r.status_code != 200:
-            return None
-        return r.json()
-
-    happy_anim = load_lottieurl("https://assets4.lottiefiles.com/packages/lf20_4kx2q32n.json")
-    sad_anim = load_lottieurl("https://assets9.lottiefiles.com/packages/lf20_jcikwtux.json")
-    neutral_anim = load_lottieurl("https://assets3.lottiefiles.com/packages/lf20_3u5u5p1k.json")
-
     # Page setup
     #st.set_page_config(page_title="Child Mood & Behavior Tracker", page_icon="🧠", layout="centered")
     st.markdown("""
@@ -63,19 +91,6 @@ def show():
     with col3:
         appetite = st.selectbox("🍽️ Appetite", ["Good", "Average", "Low"])
 
-    # Mood analyzer
-    @st.cache_data
-
-    def analyze_mood(text):
-        blob = TextBlob(text)
-        polarity = blob.sentiment.polarity
-        if polarity > 0.2:
-            return "Happy", polarity
-        elif polarity < -0.2:
-            return "Sad", polarity
-        else:
-            return "Neutral", polarity
-
     def get_suggestions(mood):
         return {
             "Happy": ["🎉 Keep smiling!", "👯‍♀️ Play with friends!", "📸 Take a photo of your smile!"],
@@ -90,56 +105,75 @@ def show():
         else:
             mood, polarity = analyze_mood(journal)
 
-            # Show animation
+            # Show animation (loaded only now, from memory or disk)
             st.markdown(f"### 🧠 Detected Mood: **{mood}** (Score: `{round(polarity, 2)}`)")
-            if mood == "Happy":
-                st_lottie(happy_anim, height=200)
-            elif mood == "Sad":
-                st_lottie(sad_anim, height=200)
-            else:
-                st_lottie(neutral_anim, height=200)
+            animation = get_lottie_cache().get(mood)
+            if animation:
+                st_lottie(animation, height=200)
 
             st.subheader("🎯 What you can do:")
             for tip in get_suggestions(mood):
                 st.markdown(f"- {tip}")
 
-            # Save entry
+            # Save entry (queued; the shared writer appends it with the next batch)
             entry = {
-                "Date": [datetime.now().strftime("%Y-%m-%d %H:%M")],
-                "Mood": [mood],
-                "Emoji": [mood_emoji.split()[0]],
-                "Polarity": [polarity],
-                "Sleep": [sleep_hours],
-                "Screen Time": [screen_time],
-                "Appetite": [appetite],
-                "Journal": [journal]
+                "Date": datetime.now().strftime("%Y-%m-%d %H:%M"),
+                "Mood": mood,
+                "Emoji": mood_emoji.split()[0],
+                "Polarity": polarity,
+                "Sleep": sleep_hours,
+                "Screen Time": screen_time,
+                "Appetite": appetite,
+                "Journal": journal
             }
-            new_df = pd.DataFrame(entry)
-
-            if os.path.exists("mood_data.csv"):
-                new_df.to_csv("mood_data.csv", mode='a', header=False, index=False)
-            else:
-                new_df.to_csv("mood_data.csv", index=False)
-
-            st.success("✅ Mood entry saved successfully!")
+            writer = get_mood_writer()
+            try:
+                writer.submit(entry).result(timeout=5)
+                get_journal_index().refresh()  # index the new entry now, not on the next search
+                st.success("✅ Mood entry saved successfully!")
+            except futures.TimeoutError:
+                st.info("⏳ Mood entry queued; it will appear in the history shortly.")
+            except OSError as e:
+                st.error(f"❌ Could not save the mood entry: {e}")
+            m = writer.metrics()
+            st.caption(f"Writer: {m['pending']} pending, last flush {m['last_flush_ms']:.1f} ms "
+                       f"(p99 {m['flush_ms_p99']:.1f} ms)")
 
     # Mood history section
     st.markdown("---")
     st.markdown("## 📅 Mood History & Trends")
 
-    if os.path.exists("mood_data.csv"):
-        df = pd.read_csv("mood_data.csv")
-        df['Date'] = pd.to_datetime(df['Date'])
+    history = get_mood_history()
+    history.refresh()
+    if history.entries:
+        st.dataframe(history.recent(10)[["Date", "Emoji", "Mood", "Sleep", "Screen Time", "Appetite"]])
 
-        st.dataframe(df.tail(10)[["Date", "Emoji", "Mood", "Sleep", "Screen Time", "Appetite"]])
+        # Charts read the pre-aggregated rollups, downsampled to the visible range
+        first, last = history.span()
+        start, end = first, last
+        if first < last:
+            start, end = st.slider("📆 Date range", min_value=first, max_value=last, value=(first, last),
+                                   format="YYYY-MM-DD")
+        fig1, fig2 = load_trend_figures(history.version, start, end, CHART_WIDTH)
 
         # Chart for Polarity
-        fig1 = px.line(df, x='Date', y='Polarity', title='🧠 Mood Polarity Over Time', markers=True)
         st.plotly_chart(fig1, use_container_width=True)
 
         # Chart for Sleep and Screen Time
-        fig2 = px.bar(df, x='Date', y=['Sleep', 'Screen Time'], title='📊 Sleep vs Screen Time')
         st.plotly_chart(fig2, use_container_width=True)
+
+        # Journal search over the selected date range (index lookups, no log scan)
+        st.markdown("### 🔎 Search Journal")
+        query = st.text_input("Words or \"a phrase\" to find in journal entries:")
+        if query.strip():
+            index = get_journal_index()
+            index.refresh()  # entries appended by other processes or tools
+            matches = index.search(query, start, end)
+            if matches.empty:
+                st.info("No journal entries match your search in this date range.")
+            else:
+                st.caption(f"{len(matches)} most recent matches")
+                st.dataframe(matches[["Date", "Mood", "Journal"]])
     else:
         st.info("📝 No mood data available yet. Start journaling to view trends!")
 
@@ -0,0 +1,103 @@
+# Plotly figures for the mood history, sized to the chart rather than the log.
+#
+# A chart a few hundred pixels wide cannot show more than a few hundred
+# points, so the polarity line gets at most one point per two pixels (LTTB over
+# daily means) and the sleep/screen-time chart at most one bar per eight
+# pixels (equal multi-day buckets), whatever the length of the history.
+#
+#   python mood_charts.py bench    # payload size and build time, raw vs downsampled
+
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+import plotly.express as px
+
+from mood_history import DATE_FORMAT, MoodHistory
+
+CHART_WIDTH = 800  # px; roughly a centered Streamlit column
+
+
+def chart_budget(width=CHART_WIDTH):
+    # (line points, bars) for a chart ``width`` pixels wide.
+    return max(width // 2, 10), max(width // 8, 5)
+
+
+def polarity_figure(line):
+    return px.line(line, x='Date', y='Polarity', title='🧠 Mood Polarity Over Time (daily average)',
+                   markers=True, hover_data=['Entries'])
+
+
+def behavior_figure(bars, bucket_days):
+    period = "daily" if bucket_days == 1 else f"{bucket_days}-day"
+    return px.bar(bars, x='Date', y=['Sleep', 'Screen Time'], barmode='group',
+                  title=f'📊 Sleep vs Screen Time ({period} average)')
+
+
+# ------------------ Benchmark ------------------
+def synthetic_log(path, n_entries, years=5, seed=0):
+    rng = np.random.default_rng(seed)
+    minutes = np.sort(rng.integers(0, years * 365 * 24 * 60, n_entries))
+    dates = pd.Timestamp("2020-01-01") + pd.to_timedelta(minutes, unit="min")
+    polarity = rng.uniform(-1, 1, n_entries).round(3)
+    pd.DataFrame({
+        "Date": dates.strftime(DATE_FORMAT),
+        "Mood": np.where(polarity > 0.2, "Happy", np.where(polarity < -0.2, "Sad", "Neutral")),
+        "Emoji": "😀", "Polarity": polarity,
+        "Sleep": rng.integers(0, 13, n_entries), "Screen Time": rng.integers(0, 11, n_entries),
+        "Appetite": rng.choice(["Good", "Average", "Low"], n_entries), "Journal": "ok",
+    }).to_csv(path, index=False)
+
+
+def _payload(*figures):
+    return sum(len(fig.to_json()) for fig in figures)
+
+
+def benchmark(n_entries, width=CHART_WIDTH):
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "mood_data.csv")
+        synthetic_log(path, n_entries)
+
+        # What the page used to do: every raw row into both charts.
+        start = time.perf_counter()
+        df = pd.read_csv(path)
+        df['Date'] = pd.to_datetime(df['Date'])
+        raw = (px.line(df, x='Date', y='Polarity', markers=True), px.bar(df, x='Date', y=['Sleep', 'Screen Time']))
+        results["raw_bytes"] = _payload(*raw)
+        results["raw_s"] = time.perf_counter() - start
+        del df, raw
+
+        points, bars = chart_budget(width)
+        start = time.perf_counter()
+        history = MoodHistory(path)
+        history.refresh()
+        results["rollup_s"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        line, bar_frame, bucket_days = history.trend(max_points=points, max_bars=bars)
+        figures = (polarity_figure(line), behavior_figure(bar_frame, bucket_days))
+        results["downsampled_bytes"] = _payload(*figures)
+        results["downsampled_s"] = time.perf_counter() - start
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Mood chart tools.")
+    parser.add_argument('command', choices=['bench'])
+    parser.add_argument('--entries', type=int, nargs='+', default=[1_000, 100_000, 1_000_000])
+    parser.add_argument('--width', type=int, default=CHART_WIDTH)
+    args = parser.parse_args(argv)
+
+    for n in args.entries:
+        r = benchmark(n, args.width)
+        print(f"{n:>9,} entries  raw: {r['raw_bytes'] / 1e6:8.2f} MB {r['raw_s']:7.2f}s   "
+              f"downsampled: {r['downsampled_bytes'] / 1e6:6.3f} MB {r['downsampled_s'] * 1e3:6.1f} ms "
+              f"(+ one-time rollup {r['rollup_s']:.2f}s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,237 @@
+# Incremental reader and rollups for the mood log.
+#
+# mood_data.csv only ever grows by appends, so MoodHistory remembers the byte
+# offset it has read up to and parses just the new records on refresh. Every
+# new record is folded into daily and weekly rollups (entry counts, sums for
+# the means, appetite counts), which are saved next to the log in
+# mood_data.rollup.json together with the offset, so a restart picks up where
+# the last reader stopped. A log that was replaced or truncated (e.g. by
+# ``sentiment.py rescore``) is detected and rolled up again from scratch.
+#
+#   python mood_history.py mood_data.csv    # refresh the rollups, print weekly trends
+
+import argparse
+import io
+import json
+import os
+import threading
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+from downsampling import bucket_sums, lttb_indices
+from log_tail import complete_records, head_hash
+
+MOOD_FILE = "mood_data.csv"
+DATE_FORMAT = "%Y-%m-%d %H:%M"
+METRICS = ["Polarity", "Sleep", "Screen Time"]
+APPETITES = ["Good", "Average", "Low"]
+RECENT = 10
+
+# Rollup columns: entry count, sum and count of each metric, appetite counts.
+_ROLLUP_COLUMNS = (["Entries"] + [f"{m} {part}" for m in METRICS for part in ("sum", "n")]
+                   + [f"Appetite {a}" for a in APPETITES])
+
+
+def _rollup(frame, freq):
+    # Per-period partial sums for ``frame``; ``freq`` is "D" or "W" (weeks start Monday).
+    day = frame["Date"].dt.normalize()
+    period = day if freq == "D" else day - pd.to_timedelta(day.dt.weekday, unit="D")
+    parts = {"Entries": frame["Date"].groupby(period).size()}
+    for m in METRICS:
+        values = frame[m].groupby(period)
+        parts[f"{m} sum"], parts[f"{m} n"] = values.sum(), values.count()
+    for a in APPETITES:
+        parts[f"Appetite {a}"] = (frame["Appetite"] == a).groupby(period).sum()
+    return pd.DataFrame(parts, columns=_ROLLUP_COLUMNS).astype(float)
+
+
+def _means(rollup):
+    out = pd.DataFrame(index=rollup.index.rename("Date"))
+    out["Entries"] = rollup["Entries"].astype(int)
+    for m in METRICS:
+        out[m] = rollup[f"{m} sum"] / rollup[f"{m} n"].where(rollup[f"{m} n"] > 0)
+    for a in APPETITES:
+        out[a] = rollup[f"Appetite {a}"].astype(int)
+    return out
+
+
+class MoodHistory:
+    """Tail-reading view of the mood log with persisted daily/weekly rollups."""
+
+    def __init__(self, path=MOOD_FILE):
+        self.path = path
+        self.rollup_path = os.path.splitext(path)[0] + ".rollup.json"
+        self._lock = threading.Lock()
+        self._reset()
+        self._load_rollups()
+
+    def _reset(self):
+        self.offset = 0
+        self.columns = None
+        self._inode = None
+        self._head = None
+        self._daily = pd.DataFrame(columns=_ROLLUP_COLUMNS, dtype=float)
+        self._weekly = pd.DataFrame(columns=_ROLLUP_COLUMNS, dtype=float)
+        self._recent = deque(maxlen=RECENT)
+
+    # ------------------ Persistence ------------------
+    def _same_log(self):
+        # The log we have read so far is still the prefix of the file on disk.
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return self.offset == 0
+        if self.offset == 0:
+            return True
+        return st.st_ino == self._inode and st.st_size >= self.offset and head_hash(self.path, self.offset) == self._head
+
+    def _load_rollups(self):
+        try:
+            with open(self.rollup_path, encoding="utf-8") as f:
+                saved = json.load(f)
+        except (OSError, ValueError):
+            return
+        self.offset, self.columns = saved["offset"], saved["columns"]
+        self._inode, self._head = saved["inode"], saved["head"]
+        for name in ("daily", "weekly"):
+            frame = pd.DataFrame(**saved[name]).astype(float)
+            frame.index = pd.to_datetime(frame.index)
+            setattr(self, f"_{name}", frame)
+        self._recent.extend(saved["recent"])
+        if not self._same_log():
+            self._reset()
+
+    def _save_rollups(self):
+        def split(frame):
+            d = frame.to_dict("split")
+            d["index"] = [t.strftime("%Y-%m-%d") for t in frame.index]
+            return d
+
+        saved = {
+            "offset": self.offset, "columns": self.columns, "inode": self._inode, "head": self._head,
+            "daily": split(self._daily), "weekly": split(self._weekly), "recent": list(self._recent),
+        }
+        tmp_path = f"{self.rollup_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(json.dumps(saved))  # dumps uses the C encoder, dump does not
+        os.replace(tmp_path, self.rollup_path)
+
+    # ------------------ Reading ------------------
+    def refresh(self):
+        """Fold records appended since the last refresh; returns how many were read."""
+        with self._lock:
+            if not self._same_log():
+                self._reset()
+            try:
+                size = os.path.getsize(self.path)
+            except FileNotFoundError:
+                return 0
+            if size == self.offset:
+                return 0
+            with open(self.path, "rb") as f:
+                f.seek(self.offset)
+                chunk = complete_records(f.read(size - self.offset))
+            if not chunk:
+                return 0
+
+            if self.columns is None:
+                frame = pd.read_csv(io.BytesIO(chunk), dtype={"Journal": str})
+                self.columns = list(frame.columns)
+            else:
+                frame = pd.read_csv(io.BytesIO(chunk), header=None, names=self.columns, dtype={"Journal": str})
+            self.offset += len(chunk)
+            self._inode = os.stat(self.path).st_ino
+            self._head = head_hash(self.path, self.offset)
+            self._fold(frame)
+            self._save_rollups()
+            return len(frame)
+
+    def _fold(self, frame):
+        if frame.empty:
+            return
+        frame["Date"] = pd.to_datetime(frame["Date"], format=DATE_FORMAT, errors="coerce")
+        for m in METRICS:
+            frame[m] = pd.to_numeric(frame[m], errors="coerce")
+        dated = frame[frame["Date"].notna()]
+        self._daily = self._daily.add(_rollup(dated, "D"), fill_value=0).sort_index()
+        self._weekly = self._weekly.add(_rollup(dated, "W"), fill_value=0).sort_index()
+
+        recent = frame.tail(RECENT).copy()
+        recent["Date"] = recent["Date"].dt.strftime(DATE_FORMAT)
+        self._recent.extend(recent.astype(object).where(recent.notna(), None).to_dict("records"))
+
+    @property
+    def version(self):
+        # Changes whenever new records are folded in or the log is replaced.
+        return self._inode, self.offset
+
+    @property
+    def entries(self):
+        return int(self._daily["Entries"].sum())
+
+    def daily(self):
+        """Per-day entries, mean Polarity/Sleep/Screen Time and appetite counts."""
+        with self._lock:
+            return _means(self._daily)
+
+    def weekly(self):
+        with self._lock:
+            return _means(self._weekly)
+
+    def span(self):
+        # (first, last) day with entries, or None for an empty log.
+        with self._lock:
+            if self._daily.empty:
+                return None
+            return self._daily.index[0].date(), self._daily.index[-1].date()
+
+    def trend(self, start=None, end=None, max_points=400, max_bars=100):
+        """Chart-sized series for the days from ``start`` to ``end`` (inclusive).
+
+        Returns (line, bars, bucket_days): daily mean Polarity thinned with
+        LTTB to at most ``max_points`` points, and every metric averaged over
+        buckets of ``bucket_days`` days -- exactly, from the rollup sums -- so
+        there are at most ``max_bars`` bars.
+        """
+        start = None if start is None else pd.Timestamp(start)
+        end = None if end is None else pd.Timestamp(end)
+        with self._lock:
+            daily = self._daily.loc[start:end]
+        if daily.empty:
+            empty = _means(daily).reset_index()
+            return empty, empty, 1
+
+        line = _means(daily)[["Polarity", "Entries"]].dropna(subset=["Polarity"])
+        if len(line) > max_points:
+            line = line.iloc[lttb_indices(line.index.asi8, line["Polarity"].to_numpy(), max_points)]
+
+        first = start if start is not None else daily.index[0]
+        days = ((end if end is not None else daily.index[-1]) - first).days + 1
+        bucket_days = max(1, -(-days // max_bars))
+        starts, sums = bucket_sums(daily.index.values, daily.to_numpy(), first.to_datetime64(),
+                                   np.timedelta64(bucket_days, "D"))
+        bars = _means(pd.DataFrame(sums, index=pd.DatetimeIndex(starts), columns=daily.columns))
+        return line.reset_index(), bars.reset_index(), bucket_days
+
+    def recent(self, n=RECENT):
+        with self._lock:
+            frame = pd.DataFrame(list(self._recent)[-n:], columns=self.columns)
+        frame["Date"] = pd.to_datetime(frame["Date"], format=DATE_FORMAT, errors="coerce")
+        return frame
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Refresh and print mood history rollups.")
+    parser.add_argument('path', nargs='?', default=MOOD_FILE)
+    args = parser.parse_args(argv)
+
+    history = MoodHistory(args.path)
+    read = history.refresh()
+    print(f"{read} new entries read, {history.entries} total, offset {history.offset}")
+    print(history.weekly().round(2).to_string())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,252 @@
+# Shared write-behind appender for the mood log.
+#
+# Sessions hand entries to one MoodWriter per process instead of appending to
+# mood_data.csv themselves. A background thread flushes the queue every
+# ``interval`` seconds (or as soon as ``max_batch`` entries are waiting): the
+# whole batch is encoded up front and appended with a single O_APPEND write
+# and an fsync while holding the OS file lock on mood_data.lock, so the header
+# is written exactly once and concurrent writers -- threads, sessions or
+# processes -- never interleave partial lines. Anything that replaces the log
+# (``sentiment.py rescore``) takes the same lock.
+#
+#   python mood_writer.py bench --processes 4 --threads 8    # throughput, flush latency, integrity
+
+import argparse
+import atexit
+import csv
+import io
+import multiprocessing
+import os
+import tempfile
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+
+import numpy as np
+import pandas as pd
+
+from file_lock import FileLock
+from mood_history import DATE_FORMAT, MOOD_FILE
+
+MOOD_COLUMNS = ["Date", "Mood", "Emoji", "Polarity", "Sleep", "Screen Time", "Appetite", "Journal"]
+FLUSH_INTERVAL = 0.25  # seconds
+MAX_BATCH = 500
+
+
+def mood_lock(path=MOOD_FILE):
+    # The lock every writer of ``path`` holds: appends, headers and whole-file replaces.
+    return FileLock(os.path.splitext(path)[0] + ".lock")
+
+
+def encode_rows(rows, header=False):
+    """CSV bytes for ``rows`` (dicts keyed by MOOD_COLUMNS), one record per entry."""
+    buf = io.StringIO()
+    writer = csv.writer(buf, lineterminator="\n")
+    if header:
+        writer.writerow(MOOD_COLUMNS)
+    for row in rows:
+        writer.writerow(["" if row.get(col) is None else row.get(col) for col in MOOD_COLUMNS])
+    return buf.getvalue().encode("utf-8")
+
+
+def append_records(path, data):
+    """Append whole CSV records to ``path`` in one write; the caller holds mood_lock."""
+    fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT | getattr(os, "O_BINARY", 0), 0o644)
+    try:
+        size = os.fstat(fd).st_size
+        if size == 0:
+            data = encode_rows([], header=True) + data
+        else:
+            with open(path, "rb") as f:
+                f.seek(size - 1)
+                if f.read(1) != b"\n":
+                    data = b"\n" + data  # never glue onto a record torn by a crash
+        view = memoryview(data)
+        while view:
+            view = view[os.write(fd, view):]
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class MoodWriter:
+    """Queue of mood entries flushed in batches by a background thread."""
+
+    def __init__(self, path=MOOD_FILE, interval=FLUSH_INTERVAL, max_batch=MAX_BATCH):
+        self.path = path
+        self.interval = interval
+        self.max_batch = max_batch
+        self.lock = mood_lock(path)
+        self._cond = threading.Condition()
+        self._flush_lock = threading.Lock()  # keeps batches in submission order
+        self._pending = []  # (encoded record, future)
+        self._closed = False
+        self._flushes = 0
+        self._written = 0
+        self._errors = 0
+        self._latencies = deque(maxlen=256)
+        self._thread = threading.Thread(target=self._run, name="mood-writer", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def submit(self, entry):
+        """Queue one entry; the returned Future resolves once it is on disk."""
+        record = encode_rows([entry])
+        future = Future()
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("MoodWriter is closed")
+            self._pending.append((record, future))
+            if len(self._pending) >= self.max_batch:
+                self._cond.notify()
+        return future
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._closed or len(self._pending) >= self.max_batch,
+                                    timeout=self.interval)
+                if self._closed:
+                    return
+            self.flush()
+
+    def flush(self):
+        """Write everything queued so far; returns the number of entries written."""
+        with self._flush_lock:
+            with self._cond:
+                batch, self._pending = self._pending, []
+            if not batch:
+                return 0
+            start = time.perf_counter()
+            try:
+                with self.lock:
+                    append_records(self.path, b"".join(record for record, _ in batch))
+            except OSError as e:
+                with self._cond:
+                    self._errors += 1
+                for _, future in batch:
+                    future.set_exception(e)
+                return 0
+            with self._cond:
+                self._flushes += 1
+                self._written += len(batch)
+                self._latencies.append(time.perf_counter() - start)
+            for _, future in batch:
+                future.set_result(None)
+            return len(batch)
+
+    def close(self):
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify()
+        self._thread.join(timeout=5)
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def metrics(self):
+        with self._cond:
+            latencies = np.asarray(self._latencies) * 1e3
+            return {
+                "pending": len(self._pending),
+                "flushes": self._flushes,
+                "entries_written": self._written,
+                "flush_errors": self._errors,
+                "last_flush_ms": float(latencies[-1]) if latencies.size else 0.0,
+                "flush_ms_p50": float(np.percentile(latencies, 50)) if latencies.size else 0.0,
+                "flush_ms_p99": float(np.percentile(latencies, 99)) if latencies.size else 0.0,
+            }
+
+
+# ------------------ Benchmark ------------------
+def _entry(i):
+    # Journals with commas, quotes and newlines exercise multi-line records.
+    return {
+        "Date": time.strftime(DATE_FORMAT), "Mood": "Happy", "Emoji": "😀", "Polarity": 0.5,
+        "Sleep": i % 13, "Screen Time": i % 11, "Appetite": "Good",
+        "Journal": f'entry {i}, "quoted"\nsecond line',
+    }
+
+
+def _session(writer, n_entries, tag):
+    futures = [writer.submit(_entry(tag * n_entries + i)) for i in range(n_entries)]
+    for future in futures:
+        future.result()
+
+
+def _writer_process(path, threads, n_entries, tag, interval, results):
+    with MoodWriter(path, interval) as writer:
+        sessions = [threading.Thread(target=_session, args=(writer, n_entries, tag * threads + t))
+                    for t in range(threads)]
+        for s in sessions:
+            s.start()
+        for s in sessions:
+            s.join()
+    results.put(writer.metrics())
+
+
+def benchmark(processes=4, threads=8, n_entries=500, interval=FLUSH_INTERVAL):
+    total = processes * threads * n_entries
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "mood_data.csv")
+        results = multiprocessing.Queue()
+        workers = [multiprocessing.Process(target=_writer_process,
+                                           args=(path, threads, n_entries, p, interval, results))
+                   for p in range(processes)]
+        start = time.perf_counter()
+        for w in workers:
+            w.start()
+        metrics = [results.get() for _ in workers]
+        for w in workers:
+            w.join()
+        elapsed = time.perf_counter() - start
+
+        df = pd.read_csv(path, dtype={"Journal": str})
+        ids = df["Journal"].str.extract(r"^entry (\d+),")[0].astype(int)
+        intact = (list(df.columns) == MOOD_COLUMNS and len(df) == total and ids.nunique() == total
+                  and df["Journal"].str.endswith('"quoted"\nsecond line').all())
+
+        # The old save path: one to_csv append per entry, no lock, no fsync.
+        old = os.path.join(tmp, "old.csv")
+        n_old = min(total, 2_000)
+        start = time.perf_counter()
+        for i in range(n_old):
+            frame = pd.DataFrame({k: [v] for k, v in _entry(i).items()})
+            frame.to_csv(old, mode='a', header=not os.path.exists(old), index=False)
+        old_per_s = n_old / (time.perf_counter() - start)
+
+    latencies = [m["flush_ms_p50"] for m in metrics]
+    return {
+        "entries": total, "seconds": elapsed, "per_s": total / elapsed, "intact": intact,
+        "flushes": sum(m["flushes"] for m in metrics),
+        "flush_ms_p50": float(np.median(latencies)),
+        "flush_ms_p99": max(m["flush_ms_p99"] for m in metrics),
+        "old_per_s": old_per_s,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Mood log writer tools.")
+    parser.add_argument('command', choices=['bench'])
+    parser.add_argument('--processes', type=int, default=4)
+    parser.add_argument('--threads', type=int, default=8, help="sessions per process")
+    parser.add_argument('--entries', type=int, default=500, help="entries per session")
+    parser.add_argument('--interval', type=float, default=FLUSH_INTERVAL)
+    args = parser.parse_args(argv)
+
+    r = benchmark(args.processes, args.threads, args.entries, args.interval)
+    print(f"{r['entries']:,} entries from {args.processes} processes x {args.threads} sessions: "
+          f"{r['seconds']:.2f}s ({r['per_s']:,.0f} entries/s), log intact: {r['intact']}")
+    print(f"{r['flushes']} flushes, flush latency p50 {r['flush_ms_p50']:.2f} ms, p99 {r['flush_ms_p99']:.2f} ms")
+    print(f"old per-entry to_csv append (no lock, no fsync): {r['old_per_s']:,.0f} entries/s")
+
+
+if __name__ == "__main__":
+    main()
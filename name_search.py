@@ -0,0 +1,185 @@
+# Typo-tolerant search over medicine names.
+#
+# Names are lowercased down to their letters and digits and split into
+# character trigrams, padded so the first letters of a name get trigrams of
+# their own. Every trigram keeps a posting list of the names containing it,
+# so a query only touches names sharing at least one trigram with it. Matches
+# are ranked by the share of the query's trigrams they contain (queries are
+# not padded at the end, so "para" fully matches "Paracetamol 250mg"), then by
+# overall similarity so shorter, closer names come first. Names are added and
+# retired incrementally as the inventory changes.
+#
+#   python name_search.py bench    # build/query timings on a synthetic catalog
+
+import argparse
+import re
+import threading
+import time
+from array import array
+
+import numpy as np
+
+MIN_COVERAGE = 0.3
+
+
+def search_key(name):
+    return " ".join(re.findall(r"[a-z0-9]+", str(name).lower()))
+
+
+def trigrams(key, pad_end=True):
+    padded = "  " + key + (" " if pad_end else "")
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class TrigramIndex:
+    """Incremental trigram index answering top-k fuzzy name queries."""
+
+    def __init__(self, names=()):
+        self.names = []
+        self.ids = {}
+        self.version = None
+        self._postings = {}
+        self._sizes = array("i")
+        self._alive = bytearray()
+        self._n_alive = 0
+        self._lock = threading.Lock()
+        self.add(names)
+
+    def __len__(self):
+        return self._n_alive
+
+    def add(self, names):
+        with self._lock:
+            self._add(names)
+
+    def remove(self, names):
+        # Names are retired, not unindexed; add() brings them back for free.
+        with self._lock:
+            self._remove(names)
+
+    def sync(self, names, version=None):
+        """Make the live names exactly ``names``; a no-op when ``version`` is unchanged."""
+        names = [str(n) for n in names]
+        wanted = set(names)
+        # Version check and update under one lock hold, so two sessions syncing
+        # at once cannot interleave and leave an older name set marked current.
+        with self._lock:
+            if version is not None and version == self.version:
+                return
+            self._remove([n for n, alive in zip(self.names, self._alive) if alive and n not in wanted])
+            self._add(names)
+            self.version = version
+
+    # The caller holds self._lock.
+    def _add(self, names):
+        for name in names:
+            name = str(name)
+            code = self.ids.get(name)
+            if code is not None:
+                if not self._alive[code]:
+                    self._alive[code] = 1
+                    self._n_alive += 1
+                continue
+            code = self.ids[name] = len(self.names)
+            self.names.append(name)
+            grams = trigrams(search_key(name))
+            for gram in grams:
+                posting = self._postings.get(gram)
+                if posting is None:
+                    posting = self._postings[gram] = array("i")
+                posting.append(code)
+            self._sizes.append(len(grams))
+            self._alive.append(1)
+            self._n_alive += 1
+
+    def _remove(self, names):
+        for name in names:
+            code = self.ids.get(str(name))
+            if code is not None and self._alive[code]:
+                self._alive[code] = 0
+                self._n_alive -= 1
+
+    def search(self, query, k=20):
+        """Up to ``k`` live names best matching ``query``, best first.
+
+        An empty query returns the first ``k`` names in insertion order.
+        """
+        key = search_key(query)
+        grams = trigrams(key, pad_end=False)
+        with self._lock:
+            # Copies, not views: add() must be free to grow the buffers.
+            alive = np.frombuffer(self._alive, dtype=np.bool_).copy()
+            if not key:
+                return [self.names[i] for i in np.flatnonzero(alive)[:k]]
+            postings = [self._postings[g] for g in grams if g in self._postings]
+            if not postings:
+                return []
+            shared = np.bincount(np.concatenate([np.frombuffer(p, dtype=np.int32) for p in postings]),
+                                 minlength=len(self.names))
+            sizes = np.array(self._sizes, dtype=np.int32)
+            names = self.names
+
+        candidates = np.flatnonzero((shared > 0) & alive)
+        hits = shared[candidates]
+        coverage = hits / len(grams)
+        similarity = hits / (len(grams) + sizes[candidates] - hits)
+        # Coverage moves in steps of 1/len(grams); similarity only breaks ties.
+        score = coverage + similarity / (len(grams) + 1)
+        keep = coverage >= MIN_COVERAGE
+        candidates, score = candidates[keep], score[keep]
+        if len(candidates) > k:
+            top = np.argpartition(-score, k)[:k]
+            candidates, score = candidates[top], score[top]
+        order = np.lexsort((candidates, -score))
+        return [names[i] for i in candidates[order]]
+
+
+# ------------------ Benchmark ------------------
+_STEMS = ["para", "ceta", "amox", "cilli", "ibu", "pro", "fen", "cetiri", "zine", "vita", "min", "met",
+          "formin", "ator", "vasta", "tin", "lisino", "pril", "omep", "razole", "azithro", "mycin"]
+
+
+def benchmark(n_names=200_000, queries=200, seed=0):
+    rng = np.random.default_rng(seed)
+    parts = rng.integers(0, len(_STEMS), (n_names, 4))
+    doses = rng.choice([5, 10, 25, 50, 100, 250, 500], n_names)
+    names = [f"{_STEMS[a].title()}{_STEMS[b]}{_STEMS[c]}{_STEMS[d]} {dose}mg"
+             for (a, b, c, d), dose in zip(parts, doses)]
+
+    start = time.perf_counter()
+    index = TrigramIndex(names)
+    build = time.perf_counter() - start
+
+    start = time.perf_counter()
+    index.add(f"Extra{i} 5mg" for i in range(1_000))
+    add_1k = time.perf_counter() - start
+
+    probes = [names[i] for i in rng.integers(0, n_names, queries)]
+    timings = {}
+    for label, make in (("prefix", lambda s: s[:4]),
+                        ("typo", lambda s: s[:3] + s[4:].split()[0]),
+                        ("full", lambda s: s)):
+        latencies = []
+        for probe in probes:
+            start = time.perf_counter()
+            index.search(make(probe), k=20)
+            latencies.append(time.perf_counter() - start)
+        timings[label] = np.percentile(np.array(latencies) * 1e3, [50, 99])
+    return {"build_s": build, "add_1k_ms": add_1k * 1e3, "names": len(index), "timings": timings}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Medicine name search index tools.")
+    parser.add_argument('command', choices=['bench'])
+    parser.add_argument('--names', type=int, default=200_000)
+    parser.add_argument('--queries', type=int, default=200)
+    args = parser.parse_args(argv)
+
+    r = benchmark(args.names, args.queries)
+    print(f"build {r['names']} names: {r['build_s']:.2f}s, add 1k more: {r['add_1k_ms']:.1f} ms")
+    for label, (p50, p99) in r["timings"].items():
+        print(f"{label:<7} query top-20: p50 {p50:.2f} ms  p99 {p99:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
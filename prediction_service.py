@@ -0,0 +1,156 @@
+# Shared micro-batching front end for growth predictions.
+#
+# Sessions submit single rows; a worker thread gathers whatever arrives within
+# a short window (or until the batch is full), runs one batched predict and
+# resolves each caller's future.
+#
+#   python prediction_service.py loadtest   # throughput at 1/10/100 callers
+
+import argparse
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import numpy as np
+
+_STOP = object()
+
+
+class PredictionService:
+    """Queue rows from many threads and predict them in batches.
+
+    ``predict_fn`` takes a 2-D array and returns one value per row. Rows that
+    are not 1-D (or not ``n_features`` long, when given) are rejected at submit.
+    """
+
+    def __init__(self, predict_fn, max_batch=64, max_wait=0.002, history=1024, n_features=None):
+        self.predict_fn = predict_fn
+        self.n_features = n_features
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._batch_sizes = deque(maxlen=history)
+        self._wait_times = deque(maxlen=history)
+        self._batches = 0
+        self._rows = 0
+        self._worker = threading.Thread(target=self._run, name="prediction-service", daemon=True)
+        self._worker.start()
+
+    # ------------------ Public API ------------------
+    def submit(self, row):
+        future = Future()
+        try:
+            row = np.asarray(row, dtype=np.float64)
+        except (TypeError, ValueError) as exc:
+            future.set_exception(exc)
+            return future
+        if row.ndim != 1 or (self.n_features is not None and row.shape[0] != self.n_features):
+            expected = f"{self.n_features} features" if self.n_features is not None else "a 1-D row"
+            future.set_exception(ValueError(f"Expected {expected}, got shape {row.shape}"))
+            return future
+        self._queue.put((row, future, time.perf_counter()))
+        return future
+
+    def predict(self, row, timeout=None):
+        return self.submit(row).result(timeout)
+
+    def metrics(self):
+        with self._lock:
+            sizes = np.asarray(self._batch_sizes, dtype=np.float64)
+            waits = np.asarray(self._wait_times, dtype=np.float64) * 1e3
+            return {
+                "queue_depth": self._queue.qsize(),
+                "batches": self._batches,
+                "rows": self._rows,
+                "mean_batch_size": float(sizes.mean()) if sizes.size else 0.0,
+                "max_batch_size": int(sizes.max()) if sizes.size else 0,
+                "wait_ms_p50": float(np.percentile(waits, 50)) if waits.size else 0.0,
+                "wait_ms_p99": float(np.percentile(waits, 99)) if waits.size else 0.0,
+            }
+
+    def close(self):
+        self._queue.put(_STOP)
+        self._worker.join()
+
+    # ------------------ Worker ------------------
+    def _collect(self, first):
+        batch = [first]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.perf_counter()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is _STOP:
+                self._queue.put(_STOP)
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self):
+        while True:
+            first = self._queue.get()
+            if first is _STOP:
+                return
+            batch = self._collect(first)
+            started = time.perf_counter()
+            try:  # a failure only fails this batch; the worker keeps serving
+                predictions = self.predict_fn(np.stack([row for row, _, _ in batch]))
+            except Exception as exc:
+                for _, future, _ in batch:
+                    future.set_exception(exc)
+            else:
+                for (_, future, _), value in zip(batch, predictions):
+                    future.set_result(float(value))
+            with self._lock:
+                self._batches += 1
+                self._rows += len(batch)
+                self._batch_sizes.append(len(batch))
+                self._wait_times.extend(started - queued for _, _, queued in batch)
+
+
+# ------------------ Load Test ------------------
+def load_test(predict_fn, rows, concurrency, requests_per_caller=200):
+    service = PredictionService(predict_fn)
+
+    def caller(offset):
+        for i in range(requests_per_caller):
+            service.predict(rows[(offset + i) % len(rows)])
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(caller, range(concurrency)))
+    elapsed = time.perf_counter() - start
+    metrics = service.metrics()
+    service.close()
+    metrics["throughput"] = concurrency * requests_per_caller / elapsed
+    return metrics
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load-test the growth prediction service.")
+    parser.add_argument('command', choices=['loadtest'])
+    parser.add_argument('--requests', type=int, default=200, help="requests per caller")
+    args = parser.parse_args(argv)
+
+    import growth
+    predictor = growth.load_predictor(growth.generate_synthetic_data())
+
+    rng = np.random.default_rng(0)
+    height = rng.uniform(50, 200, 1000)
+    weight = rng.uniform(5, 100, 1000)
+    rows = np.column_stack([rng.uniform(0, 18, 1000), height, weight, weight / (height / 100) ** 2])
+
+    for concurrency in (1, 10, 100):
+        m = load_test(predictor.predict, rows, concurrency, args.requests)
+        print(f"{concurrency:>3} callers: {m['throughput']:8.0f} req/s  "
+              f"mean batch {m['mean_batch_size']:5.1f}  "
+              f"wait p50 {m['wait_ms_p50']:.2f} ms  p99 {m['wait_ms_p99']:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+# Bulk ingestion of medicine box photos.
+#
+# Images (or zip archives of them) are decoded in a process pool, payloads are
+# validated against the inventory schema and de-duplicated by a hash of the
+# normalized row, and everything that survives goes into the store in one
+# batched write. Every file gets a line in the report, whatever happened to it.
+#
+#   python qr_ingest.py restock.zip photos/ box1.jpg --report report.csv
+
+import argparse
+import hashlib
+import io
+import json
+import os
+import time
+import zipfile
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+
+import cv2
+import numpy as np
+import pandas as pd
+
+from medicine_store import MEDICINE_DB, SQLiteMedicineStore, validate_row
+from qr_scanner import get_decoder
+
+IMAGE_EXTENSIONS = {".png", ".jpg", ".jpeg", ".bmp", ".webp", ".tif", ".tiff"}
+REPORT_COLUMNS = ["File", "Status", "Medicine Name", "Detail"]
+# Corrupt, truncated, encrypted or oddly compressed archives and members.
+_ZIP_ERRORS = (zipfile.BadZipFile, OSError, RuntimeError, NotImplementedError, zlib.error)
+
+
+def _is_image(name):
+    return os.path.splitext(name)[1].lower() in IMAGE_EXTENSIONS
+
+
+def iter_zip(name, data):
+    # (member name, bytes, error) for every image in an archive given as bytes or a path.
+    source = data if isinstance(data, str) else io.BytesIO(data)
+    try:
+        archive = zipfile.ZipFile(source)
+    except _ZIP_ERRORS as e:
+        yield name, None, f"not a readable zip archive: {e}"
+        return
+    with archive:
+        for info in archive.infolist():
+            if info.is_dir() or info.filename.startswith("__MACOSX/") or not _is_image(info.filename):
+                continue
+            member = f"{name}/{info.filename}"
+            try:
+                yield member, archive.read(info), None
+            except _ZIP_ERRORS as e:
+                yield member, None, f"could not extract from archive: {e}"
+
+
+def expand(items):
+    """Flatten (name, bytes) uploads into (name, bytes, error) image entries, opening zip archives.
+
+    A zip archive may also be given as ``(path, path)``; it is read from disk.
+    """
+    for name, data in items:
+        if name.lower().endswith(".zip"):
+            yield from iter_zip(name, data)
+        else:
+            yield name, data, None
+
+
+def expand_paths(paths):
+    # CLI inputs: files, zip archives and directories (searched recursively).
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, files in os.walk(path):
+                for file in sorted(files):
+                    if _is_image(file) or file.lower().endswith(".zip"):
+                        yield from expand_paths([os.path.join(root, file)])
+        elif path.lower().endswith(".zip"):
+            yield path, path  # opened lazily by expand()
+        else:
+            with open(path, "rb") as f:
+                yield path, f.read()
+
+
+# ------------------ Decoding ------------------
+def decode_bytes(data):
+    # Worker: (QR text or None, error or None) for one encoded image.
+    image = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+    if image is None:
+        return None, "not a readable image"
+    return get_decoder().decode_text(image, full_res_fallback=True), None
+
+
+def decode_all(blobs, workers=None):
+    workers = min(workers or os.cpu_count() or 1, len(blobs))
+    if workers <= 1:
+        return [decode_bytes(b) for b in blobs]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(decode_bytes, blobs, chunksize=max(1, len(blobs) // (workers * 4))))
+
+
+def content_hash(row):
+    return hashlib.sha256(json.dumps(row, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+def ingest(items, store, workers=None, dry_run=False):
+    """Decode, validate, de-duplicate and insert ``(name, bytes)`` items.
+
+    Zip archives among ``items`` are expanded. Returns the per-file report
+    as a DataFrame with REPORT_COLUMNS; rows with Status "added" were written
+    to ``store`` in a single ``add`` call (none when ``dry_run``).
+    """
+    entries = list(expand(items))
+    decoded = iter(decode_all([data for _, data, error in entries if error is None], workers))
+
+    report, rows, seen = [], [], {}
+    for name, _, error in entries:
+        text, error = (None, error) if error else next(decoded)
+        if error:
+            report.append((name, "unreadable", "", error))
+            continue
+        if text is None:
+            report.append((name, "no QR code", "", ""))
+            continue
+        try:
+            row = validate_row(json.loads(text))
+        except json.JSONDecodeError as e:
+            report.append((name, "invalid", "", f"Invalid QR code format: {e}"))
+            continue
+        except ValueError as e:
+            report.append((name, "invalid", "", str(e)))
+            continue
+        digest = content_hash(row)
+        if digest in seen:
+            report.append((name, "duplicate", row["Medicine Name"], f"same payload as {seen[digest]}"))
+            continue
+        seen[digest] = name
+        rows.append(row)
+        report.append((name, "added", row["Medicine Name"], ""))
+
+    if rows and not dry_run:
+        store.add(rows)
+    return pd.DataFrame(report, columns=REPORT_COLUMNS)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Add medicines from many QR code photos at once.")
+    parser.add_argument('paths', nargs='+', help="images, zip archives or directories")
+    parser.add_argument('--db', default=MEDICINE_DB, help="inventory database")
+    parser.add_argument('--workers', type=int, help="decoding processes (default: all cores)")
+    parser.add_argument('--report', help="write the per-file report to this CSV")
+    parser.add_argument('--dry-run', action='store_true', help="decode and validate only")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    report = ingest(expand_paths(args.paths), SQLiteMedicineStore(args.db), args.workers, args.dry_run)
+    elapsed = time.perf_counter() - start
+
+    if args.report:
+        report.to_csv(args.report, index=False)
+    for row in report.itertuples(index=False):
+        if row.Status != "added":
+            print(f"{row.Status:<11} {row.File}  {row.Detail}")
+    counts = report["Status"].value_counts()
+    print(", ".join(f"{n} {status}" for status, n in counts.items()) + f" in {elapsed:.2f}s ({len(report)} files)")
+
+
+if __name__ == "__main__":
+    main()
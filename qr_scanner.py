@@ -0,0 +1,212 @@
+# QR decoding for medicine boxes, plus a threaded camera pipeline.
+#
+# CameraScanner splits scanning into a capture thread and a decode thread
+# joined by a small queue that drops stale frames, so a slow decode never
+# backs the camera up and the Streamlit script only polls for results.
+# The source can be a device index or a video file:
+#
+#   python qr_scanner.py boxes.mp4      # decode a recording, print metrics
+
+import argparse
+import json
+import queue
+import threading
+import time
+from collections import deque
+
+import cv2
+import numpy as np
+from PIL import Image
+
+DECODE_WIDTH = 640
+
+
+class QRDecoder:
+    """Reusable QR decoder working on downscaled grayscale frames.
+
+    cv2.QRCodeDetector is not thread-safe: use one decoder per thread
+    (see ``get_decoder``).
+    """
+
+    def __init__(self, decode_width=DECODE_WIDTH):
+        self.detector = cv2.QRCodeDetector()
+        self.decode_width = decode_width
+        self._aruco = None
+
+    def _prepare(self, image, bgr, width):
+        if isinstance(image, Image.Image):
+            image = np.array(image.convert("RGB"))
+            bgr = False
+        elif not isinstance(image, np.ndarray):
+            raise TypeError("Unsupported image format.")
+        if image.ndim == 3:
+            image = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY if bgr else cv2.COLOR_RGB2GRAY)
+        h, w = image.shape[:2]
+        if width and w > width:
+            image = cv2.resize(image, (width, int(h * width / w)), interpolation=cv2.INTER_AREA)
+        return image
+
+    def decode_text(self, image, bgr=True, full_res_fallback=False):
+        data, _, _ = self.detector.detectAndDecode(self._prepare(image, bgr, self.decode_width))
+        if not data and full_res_fallback and self.decode_width:
+            # Small codes in large photos can vanish when downscaled.
+            full = self._prepare(image, bgr, None)
+            data, _, _ = self.detector.detectAndDecode(full)
+            if not data and hasattr(cv2, "QRCodeDetectorAruco"):
+                # Slower, but finds some codes the default detector misses (OpenCV >= 4.8).
+                if self._aruco is None:
+                    self._aruco = cv2.QRCodeDetectorAruco()
+                data, _, _ = self._aruco.detectAndDecode(full)
+        return data or None
+
+    def decode(self, image, bgr=True, full_res_fallback=False):
+        # Parsed JSON payload, or None when there is no QR code.
+        # Raises ValueError when a code is found but is not valid JSON.
+        text = self.decode_text(image, bgr, full_res_fallback)
+        if text is None:
+            return None
+        try:
+            return json.loads(text)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Invalid QR code format: {e}") from e
+
+
+_local = threading.local()
+
+
+def get_decoder():
+    # One decoder per thread (Streamlit sessions each run on their own thread).
+    decoder = getattr(_local, "decoder", None)
+    if decoder is None:
+        decoder = _local.decoder = QRDecoder()
+    return decoder
+
+
+# ------------------ Camera Pipeline ------------------
+class CameraScanner:
+    """Capture thread -> latest-frame queue -> decoder thread -> results queue."""
+
+    def __init__(self, source=0, max_queue=2, decode_width=DECODE_WIDTH):
+        self.source = source
+        self.frames = queue.Queue(maxsize=max_queue)
+        self.results = queue.Queue()
+        self.decoder = QRDecoder(decode_width)
+        self.stopped = threading.Event()
+        self.capture_done = threading.Event()
+        self._lock = threading.Lock()
+        self._latest = None
+        self._started = None
+        self._captured = 0
+        self._decoded = 0
+        self._dropped = 0
+        self._latencies = deque(maxlen=256)
+        self._threads = [
+            threading.Thread(target=self._capture, name="qr-capture", daemon=True),
+            threading.Thread(target=self._decode, name="qr-decode", daemon=True),
+        ]
+
+    def start(self):
+        self._started = time.perf_counter()
+        for t in self._threads:
+            t.start()
+        return self
+
+    def stop(self):
+        self.stopped.set()
+        for t in self._threads:
+            t.join(timeout=2)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def latest_frame(self):
+        with self._lock:
+            return self._latest
+
+    def _capture(self):
+        cam = cv2.VideoCapture(self.source)
+        try:
+            while not self.stopped.is_set() and cam.isOpened():
+                ok, frame = cam.read()
+                if not ok:
+                    break
+                with self._lock:
+                    self._latest = frame
+                    self._captured += 1
+                try:
+                    self.frames.put_nowait(frame)
+                except queue.Full:
+                    # Drop the oldest frame; the decoder only cares about the newest.
+                    try:
+                        self.frames.get_nowait()
+                        with self._lock:
+                            self._dropped += 1
+                    except queue.Empty:
+                        pass
+                    self.frames.put_nowait(frame)
+        finally:
+            cam.release()
+            self.capture_done.set()
+
+    def _decode(self):
+        while not self.stopped.is_set():
+            try:
+                frame = self.frames.get(timeout=0.1)
+            except queue.Empty:
+                if self.capture_done.is_set():
+                    break
+                continue
+            start = time.perf_counter()
+            try:
+                payload = self.decoder.decode(frame)
+            except ValueError as e:
+                payload = e
+            with self._lock:
+                self._decoded += 1
+                self._latencies.append(time.perf_counter() - start)
+            if payload is not None:
+                self.results.put(payload)
+
+    def done(self):
+        # Capture ended (or stop() was called) and every queued frame was decoded.
+        return not self._threads[1].is_alive()
+
+    def metrics(self):
+        with self._lock:
+            elapsed = max(time.perf_counter() - (self._started or time.perf_counter()), 1e-9)
+            latencies = np.asarray(self._latencies) * 1e3
+            return {
+                "capture_fps": self._captured / elapsed,
+                "decode_fps": self._decoded / elapsed,
+                "dropped_frames": self._dropped,
+                "decode_ms_p50": float(np.percentile(latencies, 50)) if latencies.size else 0.0,
+                "decode_ms_p99": float(np.percentile(latencies, 99)) if latencies.size else 0.0,
+            }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Decode medicine QR codes from a camera or video file.")
+    parser.add_argument('source', nargs='?', default='0', help="device index or video file")
+    parser.add_argument('--decode-width', type=int, default=DECODE_WIDTH)
+    args = parser.parse_args(argv)
+    source = int(args.source) if args.source.isdigit() else args.source
+
+    seen = []
+    with CameraScanner(source, decode_width=args.decode_width) as scanner:
+        while not scanner.done() or not scanner.results.empty():
+            try:
+                payload = scanner.results.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            if payload not in seen:
+                seen.append(payload)
+                print(payload)
+        metrics = scanner.metrics()
+    print(json.dumps(metrics, indent=2))
+
+
+if __name__ == "__main__":
+    main()
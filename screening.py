@@ -0,0 +1,179 @@
+# Batch growth screening for clinic rosters.
+#
+# Usage:
+#   python screening.py roster.csv results.csv [--chunksize 50000]
+#   python screening.py bench [--sizes 1000 100000 10000000]   # z-score timing
+#
+# Input needs age (years), sex/gender, height (cm) and weight (kg) columns and
+# may be CSV or Parquet; the output format follows the output file extension.
+
+import argparse
+import os
+import sys
+import time
+import numpy as np
+import pandas as pd
+from scipy.special import ndtr
+
+import growth
+
+FEATURES = ['age', 'height', 'weight', 'BMI']
+
+
+# ------------------ Input ------------------
+def _is_parquet(path):
+    return os.path.splitext(path)[1].lower() in ('.parquet', '.pq')
+
+
+def iter_roster(path, chunksize=50_000):
+    # Yield the roster in chunks so large exports never sit in memory at once.
+    if _is_parquet(path):
+        import pyarrow.parquet as pq
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunksize):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, chunksize=chunksize)
+
+
+def normalize_gender(values):
+    # Accept 'Male'/'Female', 'M'/'F', 'boy'/'girl' in any case.
+    first = pd.Series(values).astype(str).str.strip().str[:1].str.upper()
+    return np.where(first.isin(['M', 'B']).to_numpy(), 'Male', 'Female')
+
+
+# ------------------ Screening ------------------
+def screen_frame(frame, model):
+    # Score one chunk; every step is a whole-column operation.
+    frame = frame.rename(columns={'sex': 'gender'})
+    age = frame['age'].to_numpy(dtype=np.float64)
+    height = frame['height'].to_numpy(dtype=np.float64)
+    weight = frame['weight'].to_numpy(dtype=np.float64)
+    gender = normalize_gender(frame['gender'])
+
+    bmi = weight / (height / 100) ** 2
+    features = pd.DataFrame({'age': age, 'height': height, 'weight': weight, 'BMI': bmi}, columns=FEATURES)
+    predicted = model.predict(features) if len(features) else np.empty(0)
+    status, min_height, max_height = growth.classify_growth(predicted, age, gender)
+
+    result = frame.assign(gender=gender)
+    result['BMI'] = bmi
+    result['BMI Category'] = growth.bmi_categories(bmi)
+    result['Predicted Height'] = predicted
+    result['WHO Min Height'] = min_height
+    result['WHO Max Height'] = max_height
+    result['Growth Status'] = status
+    z = growth.height_for_age_zscore(age * 12, gender, height)
+    result['Height Z-Score'] = z
+    result['Height Percentile'] = ndtr(z) * 100
+    return result
+
+
+class ChunkWriter:
+    # Appends frames to CSV or Parquet as they are produced.
+
+    def __init__(self, path):
+        self.path = path
+        self.parquet = _is_parquet(path)
+        self._writer = None
+        self._first = True
+
+    def write(self, frame):
+        if self.parquet:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            table = pa.Table.from_pandas(frame, preserve_index=False)
+            if self._writer is None:
+                self._writer = pq.ParquetWriter(self.path, table.schema)
+            self._writer.write_table(table)
+        else:
+            frame.to_csv(self.path, mode='w' if self._first else 'a', header=self._first, index=False)
+        self._first = False
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+
+
+def screen_file(src, dst, model=None, chunksize=50_000):
+    # Stream src through the model and WHO bands into dst; returns a status count.
+    return screen_chunks(iter_roster(src, chunksize), dst, model)
+
+
+def screen_chunks(chunks, dst, model=None):
+    # Same as screen_file for any iterable of roster frames (e.g. generated data).
+    if model is None:
+        model, _ = growth.train_model(growth.generate_synthetic_data())
+
+    counts = pd.Series(0, index=growth.GROWTH_STATUSES, dtype=np.int64)
+    writer = ChunkWriter(dst)
+    try:
+        for chunk in chunks:
+            result = screen_frame(chunk, model)
+            writer.write(result)
+            counts = counts.add(result['Growth Status'].value_counts(), fill_value=0).astype(np.int64)
+    finally:
+        writer.close()
+    return counts
+
+
+# ------------------ Benchmark ------------------
+def _random_measurements(n, seed=0):
+    rng = np.random.default_rng(seed)
+    table = growth.LMS_TABLE
+    months = rng.uniform(table.first_month, table.last_month, n)
+    gender = np.where(rng.random(n) < 0.5, 'Male', 'Female')
+    height = rng.uniform(90, 190, n)
+    return months, gender, height
+
+
+def benchmark(sizes=(1_000, 100_000, 10_000_000), loop_rows=1_000, seed=0):
+    # Seconds per height_for_age_zscore call (best of a few runs) at each size,
+    # plus the same ``loop_rows`` rows scored one at a time in a Python loop.
+    results = {}
+    for n in sizes:
+        months, gender, height = _random_measurements(n, seed)
+        times = []
+        for _ in range(3 if n > 1_000_000 else 10):
+            start = time.perf_counter()
+            growth.height_for_age_zscore(months, gender, height)
+            times.append(time.perf_counter() - start)
+        results[n] = min(times)
+
+    months, gender, height = _random_measurements(loop_rows, seed)
+    start = time.perf_counter()
+    for m, g, h in zip(months, gender, height):
+        growth.height_for_age_zscore(np.array([m]), np.array([g]), np.array([h]))
+    results["loop"] = time.perf_counter() - start
+    return results
+
+
+def bench_main(argv=None):
+    parser = argparse.ArgumentParser(prog="screening.py bench",
+                                     description="Time vectorized height-for-age z-scores.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1_000, 100_000, 10_000_000])
+    parser.add_argument('--loop-rows', type=int, default=1_000)
+    args = parser.parse_args(argv)
+
+    results = benchmark(args.sizes, args.loop_rows)
+    for n in args.sizes:
+        print(f"{n:>11,} rows: {results[n] * 1e3:10.2f} ms  ({results[n] / n * 1e9:6.0f} ns/row)")
+    print(f"{args.loop_rows:>11,} rows one at a time in a Python loop: {results['loop'] * 1e3:.2f} ms")
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if argv[:1] == ['bench']:
+        return bench_main(argv[1:])
+    parser = argparse.ArgumentParser(description="Screen a roster of children against WHO height-for-age bands.")
+    parser.add_argument('src', help="CSV or Parquet file with age, sex/gender, height and weight columns")
+    parser.add_argument('dst', help="CSV or Parquet file to write results to")
+    parser.add_argument('--chunksize', type=int, default=50_000, help="rows processed per chunk")
+    args = parser.parse_args(argv)
+
+    counts = screen_file(args.src, args.dst, chunksize=args.chunksize)
+    for status, count in counts.items():
+        print(f"{status:>13}: {count}")
+
+
+if __name__ == "__main__":
+    main()
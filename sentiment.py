@@ -0,0 +1,296 @@
+# Sentiment scoring for mood journals.
+#
+# Scoring goes through a pluggable backend: the built-in lexicon engine
+# (default; loads in milliseconds) or TextBlob itself. Both give the same
+# polarities -- see ``python sentiment.py parity``.
+#
+# Polarity depends only on the text, so scores are cached in SQLite keyed by
+# (backend name, SHA-256 of the text) and shared by every session and process.
+# Batches look up all their hashes at once, score only the misses -- in a
+# process pool when there are many -- and map polarity to moods with one
+# vectorized pass, so re-labelling a whole journal after a threshold change
+# never re-runs the analyzer.
+#
+#   python sentiment.py rescore mood_data.csv --threshold 0.25
+#   python sentiment.py bench --entries 100000 --backend textblob
+#   python sentiment.py parity sentiment_corpus.csv
+
+import argparse
+import hashlib
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from lexicon_sentiment import LEXICON_FILE, LexiconEngine
+from mood_history import MOOD_FILE
+from mood_writer import mood_lock
+from sqlite_local import LocalConnection
+
+SENTIMENT_CACHE = "sentiment_cache.db"
+SENTIMENT_CORPUS = "sentiment_corpus.csv"
+MOOD_THRESHOLD = 0.2
+MOODS = np.array(["Sad", "Neutral", "Happy"])
+DEFAULT_BACKEND = "lexicon"
+POOL_MIN_BATCH = 2_000  # below this, forking workers costs more than it saves
+_SQL_CHUNK = 900  # stays under SQLite's bound-parameter limit
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS polarity (
+    engine TEXT NOT NULL,
+    text_hash TEXT NOT NULL,
+    polarity REAL NOT NULL,
+    PRIMARY KEY (engine, text_hash)
+) WITHOUT ROWID;
+"""
+
+
+def text_hash(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def mood_labels(polarity, threshold=MOOD_THRESHOLD):
+    """Happy above ``threshold``, Sad below ``-threshold``, Neutral in between."""
+    polarity = np.asarray(polarity, dtype=np.float64)
+    return MOODS[(polarity >= -threshold).astype(np.int8) + (polarity > threshold)]
+
+
+# ------------------ Backends ------------------
+class SentimentBackend(ABC):
+    """Scores a list of texts as polarities in [-1, 1].
+
+    ``name`` is part of the cache key, so a backend whose scores change needs
+    a new name. Backends are pickled into pool workers.
+    """
+
+    name = None
+
+    @abstractmethod
+    def polarity(self, texts):
+        """One polarity per text, in order."""
+
+
+class LexiconBackend(SentimentBackend):
+    name = "lexicon"
+
+    def __init__(self, path=LEXICON_FILE):
+        self.path = path
+        self._engine = None
+
+    def __getstate__(self):
+        return {"path": self.path, "_engine": None}  # workers load their own table
+
+    def polarity(self, texts):
+        if self._engine is None:
+            self._engine = LexiconEngine(self.path)
+        return [self._engine.polarity(text) for text in texts]
+
+
+class TextBlobBackend(SentimentBackend):
+    name = "textblob"
+
+    def __init__(self):
+        self._analyzer = None
+
+    def __getstate__(self):
+        return {"_analyzer": None}
+
+    def polarity(self, texts):
+        # Calls the analyzer behind TextBlob(text).sentiment directly to skip building a blob.
+        if self._analyzer is None:
+            from textblob.en.sentiments import PatternAnalyzer
+            self._analyzer = PatternAnalyzer()
+        return [self._analyzer.analyze(text).polarity for text in texts]
+
+
+BACKENDS = {"lexicon": LexiconBackend, "textblob": TextBlobBackend}
+
+
+def get_backend(backend=DEFAULT_BACKEND):
+    if isinstance(backend, SentimentBackend):
+        return backend
+    try:
+        return BACKENDS[backend]()
+    except KeyError:
+        raise ValueError(f"Unknown sentiment backend {backend!r}; choose from {', '.join(BACKENDS)}") from None
+
+
+# ------------------ Service ------------------
+class SentimentService:
+    """Cached, batched polarity scoring."""
+
+    def __init__(self, path=SENTIMENT_CACHE, workers=None, backend=DEFAULT_BACKEND):
+        self.path = path
+        self.workers = workers
+        self.backend = get_backend(backend)
+        self._db = LocalConnection(path)
+        with self._db.connect() as conn:
+            conn.executescript(_SCHEMA)
+
+    def _cached(self, hashes):
+        conn = self._db.connect()
+        found = {}
+        for i in range(0, len(hashes), _SQL_CHUNK):
+            chunk = hashes[i:i + _SQL_CHUNK]
+            rows = conn.execute(
+                f"SELECT text_hash, polarity FROM polarity WHERE engine = ? AND text_hash IN ({', '.join('?' * len(chunk))})",
+                (self.backend.name, *chunk),
+            ).fetchall()
+            found.update(rows)
+        return found
+
+    def _score(self, texts):
+        workers = self.workers or os.cpu_count() or 1
+        if len(texts) < POOL_MIN_BATCH or workers == 1:
+            return self.backend.polarity(texts)
+        size = -(-len(texts) // (workers * 4))
+        chunks = [texts[i:i + size] for i in range(0, len(texts), size)]
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            return [p for chunk in pool.map(self.backend.polarity, chunks) for p in chunk]
+
+    def polarity(self, texts):
+        """Polarity for every text, as a float array; only unseen texts are analyzed."""
+        texts = ["" if t is None else str(t) for t in texts]
+        hashes = [text_hash(t) for t in texts]
+        unique = dict(zip(hashes, texts))
+        scores = self._cached(list(unique))
+
+        missing = [h for h in unique if h not in scores]
+        if missing:
+            fresh = self._score([unique[h] for h in missing])
+            scores.update(zip(missing, fresh))
+            with self._db.connect() as conn:
+                conn.executemany("INSERT OR REPLACE INTO polarity VALUES (?, ?, ?)",
+                                 [(self.backend.name, h, p) for h, p in zip(missing, fresh)])
+        return np.fromiter((scores[h] for h in hashes), dtype=np.float64, count=len(hashes))
+
+    def analyze(self, texts, threshold=MOOD_THRESHOLD):
+        # (mood labels, polarities) for a batch of texts.
+        polarity = self.polarity(texts)
+        return mood_labels(polarity, threshold), polarity
+
+
+# ------------------ Journal Tools ------------------
+def rescore(path=MOOD_FILE, threshold=MOOD_THRESHOLD, service=None):
+    # Recompute Polarity and Mood for a whole mood CSV and replace it atomically.
+    # Holds the writers' lock throughout so no append lands in the old file.
+    service = service or SentimentService()
+    with mood_lock(path):
+        df = pd.read_csv(path, dtype={"Journal": str}, keep_default_na=False)
+        moods, polarity = service.analyze(df["Journal"].tolist(), threshold)
+        changed = int((df["Mood"].to_numpy() != moods).sum())
+        df["Mood"], df["Polarity"] = moods, polarity
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix=".tmp")
+        with os.fdopen(fd, "w", newline="", encoding="utf-8") as f:
+            df.to_csv(f, index=False, lineterminator="\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    return len(df), changed
+
+
+def parity(corpus=SENTIMENT_CORPUS, threshold=MOOD_THRESHOLD):
+    """Compare the lexicon engine with TextBlob on a labeled corpus (text, label columns).
+
+    Returns decision agreement, the largest polarity difference, each
+    backend's accuracy against the labels, and the disagreeing texts.
+    """
+    df = pd.read_csv(corpus, keep_default_na=False)
+    texts = df["text"].tolist()
+    ours = np.array(LexiconBackend().polarity(texts))
+    theirs = np.array(TextBlobBackend().polarity(texts))
+    ours_moods, theirs_moods = mood_labels(ours, threshold), mood_labels(theirs, threshold)
+    labels = df["label"].to_numpy()
+    return {
+        "entries": len(df),
+        "agreement": float((ours_moods == theirs_moods).mean()),
+        "max_polarity_diff": float(np.abs(ours - theirs).max()) if len(df) else 0.0,
+        "lexicon_accuracy": float((ours_moods == labels).mean()),
+        "textblob_accuracy": float((theirs_moods == labels).mean()),
+        "disagreements": [t for t, a, b in zip(texts, ours_moods, theirs_moods) if a != b],
+    }
+
+
+def startup_seconds(backend):
+    # Fresh interpreter: time from a cold backend to its first score.
+    code = ("import time, sentiment; t = time.perf_counter(); "
+            f"sentiment.get_backend({backend!r}).polarity(['good']); print(time.perf_counter() - t)")
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True,
+                         cwd=os.path.dirname(os.path.abspath(__file__)))
+    return float(out.stdout.strip().splitlines()[-1])
+
+
+_WORDS = ["good", "bad", "happy", "sad", "great", "terrible", "fun", "boring", "school", "played", "friends",
+          "tired", "angry", "calm", "very", "not", "really", "lunch", "park", "homework", "the", "a", "day"]
+
+
+def benchmark(n_entries=100_000, workers=None, backend=DEFAULT_BACKEND, seed=0):
+    rng = np.random.default_rng(seed)
+    lengths = rng.integers(5, 30, n_entries)
+    words = rng.integers(0, len(_WORDS), lengths.sum())
+    bounds = np.cumsum(lengths)
+    texts = [f"{i} " + " ".join(_WORDS[w] for w in words[end - n:end]) for i, (n, end) in enumerate(zip(lengths, bounds))]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        service = SentimentService(os.path.join(tmp, "cache.db"), workers, backend)
+        results = {}
+        for label in ("cold", "warm"):
+            start = time.perf_counter()
+            polarity = service.polarity(texts)
+            results[f"{label}_s"] = time.perf_counter() - start
+        start = time.perf_counter()
+        mood_labels(polarity, 0.25)
+        results["relabel_ms"] = (time.perf_counter() - start) * 1e3
+
+    start = time.perf_counter()
+    get_backend(backend).polarity(texts[:5_000])
+    results["serial_per_s"] = 5_000 / (time.perf_counter() - start)
+    results["startup_s"] = startup_seconds(backend)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Cached sentiment scoring for mood journals.")
+    sub = parser.add_subparsers(dest='command', required=True)
+    r = sub.add_parser('rescore', help="recompute Polarity and Mood for a mood CSV")
+    r.add_argument('path', nargs='?', default=MOOD_FILE)
+    r.add_argument('--threshold', type=float, default=MOOD_THRESHOLD)
+    r.add_argument('--workers', type=int)
+    r.add_argument('--backend', choices=list(BACKENDS), default=DEFAULT_BACKEND)
+    b = sub.add_parser('bench', help="throughput on synthetic journal entries")
+    b.add_argument('--entries', type=int, default=100_000)
+    b.add_argument('--workers', type=int)
+    b.add_argument('--backend', choices=list(BACKENDS), default=DEFAULT_BACKEND)
+    p = sub.add_parser('parity', help="compare the lexicon engine with TextBlob on a labeled corpus")
+    p.add_argument('corpus', nargs='?', default=SENTIMENT_CORPUS)
+    p.add_argument('--threshold', type=float, default=MOOD_THRESHOLD)
+    args = parser.parse_args(argv)
+
+    if args.command == 'rescore':
+        total, changed = rescore(args.path, args.threshold, SentimentService(workers=args.workers, backend=args.backend))
+        print(f"Rescored {total} entries, {changed} changed mood")
+    elif args.command == 'parity':
+        res = parity(args.corpus, args.threshold)
+        print(f"{res['entries']} entries: decisions agree {res['agreement']:.1%}, "
+              f"max polarity difference {res['max_polarity_diff']:.2g}")
+        print(f"accuracy vs labels: lexicon {res['lexicon_accuracy']:.1%}, TextBlob {res['textblob_accuracy']:.1%}")
+        for text in res["disagreements"]:
+            print(f"  disagree: {text}")
+    else:
+        n = args.entries
+        res = benchmark(n, args.workers, args.backend)
+        print(f"startup ({args.backend}): {res['startup_s'] * 1e3:,.0f} ms to load and score one text")
+        print(f"serial {args.backend}:    {res['serial_per_s']:,.0f} entries/s")
+        print(f"cold (score+store): {res['cold_s']:.2f}s  {n / res['cold_s']:,.0f} entries/s")
+        print(f"warm (cache hits):  {res['warm_s']:.2f}s  {n / res['warm_s']:,.0f} entries/s")
+        print(f"relabel {n} at a new threshold: {res['relabel_ms']:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
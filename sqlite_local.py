@@ -0,0 +1,26 @@
+# Per-thread SQLite connections.
+#
+# sqlite3 connections must not be shared across threads, and Streamlit serves
+# each session on its own thread, so every SQLite-backed store keeps one
+# WAL-mode connection per thread for its database file.
+
+import sqlite3
+import threading
+
+
+class LocalConnection:
+    """One WAL-mode connection to ``path`` per thread, opened on first use."""
+
+    def __init__(self, path, timeout=30):
+        self.path = path
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=self.timeout)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
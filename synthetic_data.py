@@ -0,0 +1,113 @@
+# Reproducible synthetic pediatric measurements at scale.
+#
+# Heights are drawn from the WHO height-for-age LMS distributions: every child
+# gets a height-for-age z-score that drifts slightly between visits, and the
+# height at each visit is the LMS height at that z for the child's age and
+# sex. Data is produced in chunks and chunk ``i`` is drawn from its own
+# spawned seed, so the same (seed, chunk size) always reproduces the same rows
+# and any chunk can be regenerated on its own.
+#
+# Usage:
+#   python synthetic_data.py out.parquet --children 1000000 --visits 3
+#   python synthetic_data.py out.csv --children 50000
+#   python synthetic_data.py out.npy --children 5000000   # memory-mapped records
+
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+import growth
+
+COLUMNS = ['child_id', 'age', 'gender', 'height', 'weight', 'BMI']
+# Record layout of the .npy output: exact int64 IDs, float32 measurements.
+MEMMAP_DTYPE = np.dtype([('child_id', np.int64), ('age', np.float32), ('is_male', np.bool_),
+                         ('height', np.float32), ('weight', np.float32), ('BMI', np.float32)])
+
+# Rough median BMI by age (years) for school-age children; weights are drawn
+# log-normally around it since the repo only ships height-for-age tables.
+_BMI_AGES = np.array([5, 8, 11, 14, 17, 19])
+_BMI_MEDIANS = np.array([15.3, 15.7, 17.2, 19.0, 20.8, 21.5])
+_BMI_SIGMA = 0.12
+_Z_DRIFT = 0.15
+
+
+def generate_chunk(chunk_index, n_children, visits=1, seed=42, first_child_id=0):
+    # One chunk of ``n_children`` children with ``visits`` measurements each.
+    rng = np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(chunk_index,)))
+    first_month, last_month = growth.LMS_TABLE.first_month, growth.LMS_TABLE.last_month
+
+    child_id = np.repeat(np.arange(first_child_id, first_child_id + n_children), visits)
+    is_male = np.repeat(rng.random(n_children) < 0.5, visits)
+    months = np.sort(rng.uniform(first_month, last_month, (n_children, visits)), axis=1).ravel()
+
+    base_z = rng.standard_normal(n_children)
+    drift = np.cumsum(rng.normal(0, _Z_DRIFT, (n_children, visits)), axis=1)
+    z = np.clip((base_z[:, None] + drift).ravel(), -4.5, 4.5)
+
+    gender = np.where(is_male, 'Male', 'Female')
+    L, M, S = growth.LMS_TABLE.lms(months, gender)
+    height = growth.lms_height(L, M, S, z)
+
+    age = months / 12
+    bmi = np.interp(age, _BMI_AGES, _BMI_MEDIANS) * np.exp(rng.normal(0, _BMI_SIGMA, len(age)))
+    weight = bmi * (height / 100) ** 2
+
+    return pd.DataFrame({
+        'child_id': child_id, 'age': age, 'gender': gender,
+        'height': height, 'weight': weight, 'BMI': bmi,
+    }, columns=COLUMNS)
+
+
+def iter_chunks(n_children, chunk_size=100_000, visits=1, seed=42):
+    # Yield frames covering ``n_children`` children, ``chunk_size`` children at a time.
+    for index, start in enumerate(range(0, n_children, chunk_size)):
+        yield generate_chunk(index, min(chunk_size, n_children - start), visits, seed, first_child_id=start)
+
+
+def training_sample(n_rows, seed=42):
+    # A DataFrame ready for model_registry.fit_model / growth.train_model.
+    return pd.concat(iter_chunks(n_rows, seed=seed), ignore_index=True)
+
+
+# ------------------ Output ------------------
+def write_memmap(path, n_children, chunk_size=100_000, visits=1, seed=42):
+    # Stream into an .npy file of MEMMAP_DTYPE records that np.load(mmap_mode='r') can open.
+    out = np.lib.format.open_memmap(path, mode='w+', dtype=MEMMAP_DTYPE, shape=(n_children * visits,))
+    row = 0
+    for chunk in iter_chunks(n_children, chunk_size, visits, seed):
+        block = out[row:row + len(chunk)]
+        for name in MEMMAP_DTYPE.names:
+            block[name] = chunk['gender'] == 'Male' if name == 'is_male' else chunk[name]
+        row += len(chunk)
+    out.flush()
+    del out
+
+
+def write(path, n_children, chunk_size=100_000, visits=1, seed=42):
+    if os.path.splitext(path)[1].lower() == '.npy':
+        write_memmap(path, n_children, chunk_size, visits, seed)
+        return
+    from screening import ChunkWriter
+    writer = ChunkWriter(path)
+    try:
+        for chunk in iter_chunks(n_children, chunk_size, visits, seed):
+            writer.write(chunk)
+    finally:
+        writer.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate synthetic pediatric measurements from WHO LMS tables.")
+    parser.add_argument('path', help="output .csv, .parquet or .npy (memory-mapped) file")
+    parser.add_argument('--children', type=int, default=1_000_000)
+    parser.add_argument('--visits', type=int, default=1, help="measurements per child")
+    parser.add_argument('--chunk-size', type=int, default=100_000, help="children per chunk")
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args(argv)
+    write(args.path, args.children, args.chunk_size, args.visits, args.seed)
+
+
+if __name__ == "__main__":
+    main()